@@ -1,10 +1,15 @@
+import os
 from functools import wraps
 from flask import Flask
 from flask_cors import CORS
 from flask_mongoengine import MongoEngine
 
+from app.cache import configure_caches
+from app.generator import configure_search_pool
 from app.views.auth import router_auth
+from app.views.catalog import router_catalog
 from app.views.main import router_main
+from app.views.planner import router_planner
 from app.cron import cron
 from uploader.views import router_uploader
 
@@ -16,17 +21,49 @@ app.config["BASE_PATH"] = "/susunjadwal/api"
 app.config["SSO_UI_URL"] = "https://sso.ui.ac.id/cas2/"
 app.config["SECRET_KEY"] = "password"
 app.config["ACTIVE_PERIOD"] = "2018-2"
+# first and last day of lectures of the active period, bounding the weekly
+# events of exported calendars
+app.config["ACTIVE_PERIOD_START"] = "2019-02-11"
+app.config["ACTIVE_PERIOD_END"] = "2019-05-31"
 app.config["SSO_UI_FORCE_HTTPS"] = False
 app.config["MAX_CONTENT_LENGTH"] = 2 * 1024 * 1024
 
 # uploader
 app.config['UPLOAD_FOLDER'] = "__files__"
 
+# cache
+app.config["COURSES_CACHE_SIZE"] = 256
+app.config["COURSES_CACHE_TTL"] = 600
+app.config["COURSE_INDEX_CACHE_SIZE"] = 64
+app.config["SEARCH_REFRESH_INTERVAL"] = 60
+app.config["USER_SCHEDULE_CACHE_SIZE"] = 1024
+app.config["USER_SCHEDULE_CACHE_TTL"] = 300
+# Cache-Control max-age of shared user schedule pages
+app.config["USER_SCHEDULE_MAX_AGE"] = 60
+app.config["CALENDAR_CACHE_SIZE"] = 256
+app.config["TOKEN_CACHE_SIZE"] = 1024
+app.config["TOKEN_CACHE_TTL"] = 3600
+
+# schedule generator, with 0 or 1 processes large searches stay in the
+# request worker
+app.config["GENERATOR_PROCESSES"] = min(4, os.cpu_count() or 1)
+app.config["GENERATOR_PARALLEL_MIN_COURSES"] = 8
+
+# scrape jobs queued on login, see `flask cron scrape_worker`
+app.config["SCRAPE_JOB_RETRY_INTERVAL"] = 600
+app.config["SCRAPE_JOB_LOCK_SECONDS"] = 300
+# seconds before the first retry of a failed scrape, doubled after each
+app.config["SCRAPE_JOB_RETRY_DELAY"] = 60
+
 app.config.from_pyfile("config.cfg")
+configure_caches(app.config)
+configure_search_pool(app.config)
 app.register_blueprint(router_auth, url_prefix=app.config["BASE_PATH"])
 app.register_blueprint(router_main, url_prefix=app.config["BASE_PATH"])
+app.register_blueprint(router_catalog, url_prefix=app.config["BASE_PATH"])
+app.register_blueprint(router_planner, url_prefix=app.config["BASE_PATH"])
 app.register_blueprint(router_uploader, url_prefix=app.config["BASE_PATH"])
 app.register_blueprint(cron)
 
-CORS(app)
+CORS(app, expose_headers=["ETag", "X-Courses-Revision"])
 MongoEngine(app)
@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+
+from app.rooms import active_period_rooms
+from app.search import active_period_search
+
+
+class LRUCache:
+    """Thread-safe bounded LRU cache with optional time-to-live.
+
+    Entries are evicted least-recently-used first once `maxsize` is reached.
+    When `ttl` (seconds) is set, entries older than that are treated as misses.
+    """
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Encoded `GET /majors/<major_id>/courses` payloads, keyed by
+# (major_id, period_name). Sized and aged from app config on first use.
+courses_cache = LRUCache()
+
+# `GET /user_schedules/<id>` data as (owner user id, serialized schedule),
+# keyed by (user schedule id, version, name)
+user_schedule_cache = LRUCache()
+
+# `GET /user_schedules/<id>.ics` bodies as lists of chunks, keyed by
+# (user schedule id, version, name)
+calendar_cache = LRUCache()
+
+# Claims of verified JWTs, keyed by (secret key, token)
+token_cache = LRUCache()
+
+# In-memory indexes over a Period, keyed by (period_id, version, index type)
+course_index_cache = LRUCache()
+
+
+def configure_caches(config):
+    courses_cache.maxsize = config.get("COURSES_CACHE_SIZE", 256)
+    courses_cache.ttl = config.get("COURSES_CACHE_TTL", 600)
+    course_index_cache.maxsize = config.get("COURSE_INDEX_CACHE_SIZE", 64)
+    user_schedule_cache.maxsize = config.get("USER_SCHEDULE_CACHE_SIZE", 1024)
+    user_schedule_cache.ttl = config.get("USER_SCHEDULE_CACHE_TTL", 300)
+    calendar_cache.maxsize = config.get("CALENDAR_CACHE_SIZE", 256)
+    token_cache.maxsize = config.get("TOKEN_CACHE_SIZE", 1024)
+    token_cache.ttl = config.get("TOKEN_CACHE_TTL", 3600)
+    active_period_search.interval = config.get("SEARCH_REFRESH_INTERVAL", 60)
+    active_period_rooms.interval = config.get("SEARCH_REFRESH_INTERVAL", 60)
+
+
+def invalidate_courses(major_id, period_name=None):
+    """Drop cached data of a major after one of its Periods was saved."""
+    active_period_search.mark_stale()
+    active_period_rooms.mark_stale()
+    major_id = str(major_id)
+    if period_name is not None:
+        courses_cache.delete((major_id, period_name))
+    else:
+        courses_cache.delete_where(lambda key: key[0] == major_id)
+
+
+def invalidate_user_schedule(user_schedule_id):
+    """Drop a cached user schedule after it was changed or deleted."""
+    user_schedule_id = str(user_schedule_id)
+    user_schedule_cache.delete_where(lambda key: key[0] == user_schedule_id)
+    calendar_cache.delete_where(lambda key: key[0] == user_schedule_id)
@@ -0,0 +1,158 @@
+from models.period import DAYS, format_minutes, get_item_times
+
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+
+
+def get_item_mask(day, start, end):
+    """Return the week bitmask of one schedule item, 0 if it is unparseable.
+
+    Bit `day * SLOTS_PER_DAY + slot` is set for every 5-minute slot the item
+    occupies. An item ending at 09.40 does not clash with one starting then.
+    """
+    if day is None or start is None or end is None or end <= start:
+        return 0
+    first = start // SLOT_MINUTES
+    last = -(-end // SLOT_MINUTES)  # round up
+    return ((1 << (last - first)) - 1) << (day * SLOTS_PER_DAY + first)
+
+
+def get_schedule_mask(schedule_items):
+    mask = 0
+    for item in schedule_items:
+        mask |= get_item_mask(*get_item_times(item))
+    return mask
+
+
+def describe_mask(mask):
+    """Return the slots of `mask` as [{"day", "start", "end"}] ranges."""
+    ranges = []
+    for day, name in enumerate(DAYS):
+        day_mask = (mask >> (day * SLOTS_PER_DAY)) & ((1 << SLOTS_PER_DAY) - 1)
+        slot = 0
+        while day_mask:
+            if not day_mask & 1:
+                skip = (day_mask & -day_mask).bit_length() - 1
+                day_mask >>= skip
+                slot += skip
+                continue
+            length = (~day_mask & (day_mask + 1)).bit_length() - 1
+            ranges.append({
+                "day": name,
+                "start": format_minutes(slot * SLOT_MINUTES),
+                "end": format_minutes((slot + length) * SLOT_MINUTES),
+            })
+            day_mask >>= length
+            slot += length
+    return ranges
+
+
+def count_slots(mask):
+    return bin(mask).count("1")
+
+
+def count_gap_slots(mask):
+    """Return the free slots between the first and last class of each day."""
+    gaps = 0
+    for day in range(len(DAYS)):
+        day_mask = (mask >> (day * SLOTS_PER_DAY)) & DAY_MASK
+        if day_mask:
+            first = (day_mask & -day_mask).bit_length() - 1
+            gaps += day_mask.bit_length() - first - count_slots(day_mask)
+    return gaps
+
+
+def get_window_mask(days=(), before=None):
+    """Return the slots of whole `days` and of every day before `before`."""
+    mask = 0
+    for day in days:
+        mask |= DAY_MASK << (day * SLOTS_PER_DAY)
+    if before:
+        morning = (1 << -(-before // SLOT_MINUTES)) - 1
+        for day in range(len(DAYS)):
+            mask |= morning << (day * SLOTS_PER_DAY)
+    return mask
+
+
+class ScheduleMasks:
+    """Week bitmask of every class of one Period version.
+
+    `data` is a stored or serialized Period.
+    """
+
+    def __init__(self, data):
+        self.masks = {}  # (course name, class name) -> bitmask
+        self.courses = {}  # course name -> [(class name, bitmask)]
+        for course in data.get("courses", []):
+            sections = self.courses.setdefault(course.get("name"), [])
+            for class_ in course.get("classes", []):
+                mask = get_schedule_mask(class_.get("schedule_items", []))
+                self.masks[(course.get("name"), class_.get("name"))] = mask
+                sections.append((class_.get("name"), mask))
+
+    def find_conflicts(self, classes):
+        """Return every clashing pair of `classes`, as (a, b, overlap mask).
+
+        `classes` are (course name, class name) keys of `self.masks`.
+        """
+        masks = [self.masks[key] for key in classes]
+        # Without any overlap the union has as many slots as all classes
+        union = 0
+        for mask in masks:
+            union |= mask
+        if count_slots(union) == sum(count_slots(mask) for mask in masks):
+            return []
+
+        conflicts = []
+        for i, mask in enumerate(masks):
+            for j in range(i + 1, len(masks)):
+                overlap = mask & masks[j]
+                if overlap:
+                    conflicts.append((classes[i], classes[j], overlap))
+        return conflicts
+
+
+def find_double_bookings(classes):
+    """Return overlapping schedule items of classes of more than one major.
+
+    `classes` are {"major_id", "course", "class", "schedule_items"}. Items
+    on the same day, time and room are one class listed by several majors
+    and are grouped first. Clashes within a single major are left out.
+    """
+    slots = {}  # (day, start, end, room) -> classes
+    for class_ in classes:
+        for item in class_["schedule_items"]:
+            day, start, end = get_item_times(item)
+            if None not in (day, start, end) and start < end:
+                slots.setdefault((day, start, end, item.get("room")), []).append(class_)
+
+    bookings = []
+    ongoing = []
+    for slot in sorted(slots, key=lambda slot: slot[:3]):
+        day, start, end, _ = slot
+        ongoing = [
+            other for other in ongoing
+            if other[0] == day and other[2] > start
+        ]
+        for other in ongoing:
+            majors = {class_["major_id"] for class_ in slots[other] + slots[slot]}
+            if len(majors) < 2:
+                continue
+            bookings.append({
+                "day": DAYS[day],
+                "start": format_minutes(start),
+                "end": format_minutes(min(end, other[2])),
+                "classes": [
+                    {
+                        "major_id": class_["major_id"],
+                        "course": class_["course"],
+                        "class": class_["class"],
+                        "room": booked[3],
+                    }
+                    for booked in (other, slot)
+                    for class_ in slots[booked]
+                ],
+            })
+        ongoing.append(slot)
+    return bookings
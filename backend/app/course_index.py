@@ -0,0 +1,185 @@
+import bisect
+
+from app.cache import course_index_cache
+from models.period import Period, get_item_times
+
+
+class CourseIndex:
+    """In-memory lookup tables over the classes of one Period version.
+
+    Classes are numbered in course order, so sorting matched class numbers
+    keeps the original course and class order. `data` is a stored or
+    serialized Period.
+    """
+
+    def __init__(self, data):
+        serialized = Period.serialize_raw(data)
+        self.name = serialized["name"]
+        self.is_detail = serialized["is_detail"]
+        self.courses = serialized["courses"]
+        stored_courses = data.get("courses", [])
+
+        self.class_course = []  # class number -> course position
+        self.course_classes = []  # course position -> range of class numbers
+        self.by_term = {}
+        self.by_credit = {}
+        self.by_day = {}
+        self.by_name = {}  # course name -> first course position
+        self.summaries = []
+        by_start, by_end = [], []
+        course_names, lecturer_names = [], []
+
+        for position, (course, stored_course) in enumerate(
+                zip(self.courses, stored_courses)):
+            first = len(self.class_course)
+            course_names.append((course["name"] or "").lower())
+            self.by_name.setdefault(course["name"], position)
+            self.summaries.append({
+                "name": course["name"],
+                "credit": course["credit"],
+                "term": course["term"],
+                "class_count": len(course["classes"]),
+            })
+            for class_, stored_class in zip(
+                    course["classes"], stored_course.get("classes", [])):
+                number = len(self.class_course)
+                self.class_course.append(position)
+                self.by_term.setdefault(course["term"], set()).add(number)
+                self.by_credit.setdefault(course["credit"], set()).add(number)
+
+                starts, ends = [], []
+                for item in stored_class.get("schedule_items", []):
+                    day, start, end = get_item_times(item)
+                    if day is not None:
+                        self.by_day.setdefault(day, set()).add(number)
+                    starts.append(start)
+                    ends.append(end)
+                if starts and None not in starts + ends:
+                    by_start.append((min(starts), number))
+                    by_end.append((max(ends), number))
+
+                for lecturer in class_["lecturer"]:
+                    lecturer_names.append((lecturer.lower(), number))
+            self.course_classes.append(range(first, len(self.class_course)))
+
+        by_start.sort()
+        by_end.sort()
+        self.starts = [minutes for minutes, _ in by_start]
+        self.start_classes = [number for _, number in by_start]
+        self.ends = [minutes for minutes, _ in by_end]
+        self.end_classes = [number for _, number in by_end]
+
+        course_names = sorted(
+            (name, position) for position, name in enumerate(course_names))
+        self.course_names = [name for name, _ in course_names]
+        self.course_name_positions = [position for _, position in course_names]
+
+        lecturer_names.sort()
+        self.lecturer_names = [name for name, _ in lecturer_names]
+        self.lecturer_classes = [number for _, number in lecturer_names]
+
+    def _prefix_range(self, keys, prefix):
+        prefix = prefix.lower()
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + "\uffff")
+        return start, end
+
+    def _classes_of_courses(self, positions):
+        return {
+            number
+            for position in positions
+            for number in self.course_classes[position]
+        }
+
+    def search(self, term=None, credit=None, day=None, start=None, end=None,
+               lecturer=None, name=None):
+        """Return the numbers of classes matching every given filter.
+
+        `start` and `end` (minutes) keep classes whose schedule lies inside
+        the window, `lecturer` and `name` are case-insensitive prefixes.
+        Returns None when no filter is given.
+        """
+        candidates = []
+        if term is not None:
+            candidates.append(self.by_term.get(term, set()))
+        if credit is not None:
+            candidates.append(self.by_credit.get(credit, set()))
+        if day is not None:
+            candidates.append(self.by_day.get(day, set()))
+        if start is not None:
+            index = bisect.bisect_left(self.starts, start)
+            candidates.append(set(self.start_classes[index:]))
+        if end is not None:
+            index = bisect.bisect_right(self.ends, end)
+            candidates.append(set(self.end_classes[:index]))
+        if lecturer:
+            low, high = self._prefix_range(self.lecturer_names, lecturer)
+            candidates.append(set(self.lecturer_classes[low:high]))
+        if name:
+            low, high = self._prefix_range(self.course_names, name)
+            candidates.append(self._classes_of_courses(
+                self.course_name_positions[low:high]))
+
+        if not candidates:
+            return None
+
+        candidates.sort(key=len)
+        return set.intersection(*candidates)
+
+    def get_course(self, name):
+        position = self.by_name.get(name)
+        if position is None:
+            return None
+        return self.courses[position]
+
+    def get_page(self, classes=None, cursor=0, limit=50):
+        """Return (courses, next_cursor) starting at course position `cursor`.
+
+        When `classes` is given only those classes (and their courses) are
+        included.
+        """
+        if classes is None:
+            positions = range(cursor, len(self.courses))
+        else:
+            positions = sorted({
+                self.class_course[number] for number in classes
+                if self.class_course[number] >= cursor
+            })
+
+        courses = []
+        for position in positions:
+            if len(courses) == limit:
+                return courses, position
+
+            course = self.courses[position]
+            if classes is not None:
+                first = self.course_classes[position].start
+                course = {
+                    **course,
+                    "classes": [
+                        class_ for offset, class_ in enumerate(course["classes"])
+                        if first + offset in classes
+                    ],
+                }
+            courses.append(course)
+        return courses, None
+
+
+def get_period_index(period, index_class):
+    """Return `index_class` built over `period`, once per Period version.
+
+    `index_class` is called with the stored period document, which has
+    the parsed schedule times.
+    """
+    key = (str(period.id), period.version, index_class.__name__)
+    index = course_index_cache.get(key)
+    if index is None:
+        data = Period.objects(id=period.id).only(
+            "name", "is_detail", "courses").as_pymongo().first()
+        index = index_class(data)
+        course_index_cache.set(key, index)
+    return index
+
+
+def get_course_index(period):
+    return get_period_index(period, CourseIndex)
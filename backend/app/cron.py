@@ -1,10 +1,32 @@
+import collections
+import time
+import traceback
+
+import bson
+import click
+from bson import ObjectId
+from mongoengine import Q, ValidationError
+from pymongo import UpdateOne
 from flask import (
     Blueprint,
     current_app as app
 )
 
+from app.cache import invalidate_courses
+from models.lecturer_schedule import LecturerSchedule
 from models.major import Major
-from models.period import Period
+from models.period import Period, get_day_index, get_minutes
+from models.period_change import PeriodChange
+from models.scrape_job import ScrapeJob
+from models.user import User
+from models.user_schedule import (
+    ScheduleItem,
+    ScheduleItemSet,
+    UserSchedule,
+    load_schedule_item_set
+)
+from models.user_schedule_version import UserScheduleVersion
+from app.utils import run_scrape_job
 from scraper.main import scrape_courses
 
 cron = Blueprint("cron", __name__)
@@ -16,16 +38,12 @@ def update_courses():
     majors = Major.objects.all()
     for major in majors:
         major_kd_org = major.kd_org
-        period_detail = Period.objects(
-            major_id=major.id, name=period_name, is_detail=True).first()
-
-        if period_detail is None:
-            period_not_detail = Period.objects(
-                major_id=major.id, name=period_name, is_detail=False).first()
+        period = Period.get_active(major.id, period_name)
 
-            if period_not_detail is None:
-                continue
+        if period is None:
+            continue
 
+        if not period.is_detail:
             courses, is_detail = scrape_courses(major_kd_org, period_name)
             if courses:
                 if is_detail:
@@ -37,13 +55,262 @@ def update_courses():
                     )
                     period.save()
                 else:
-                    period_not_detail.courses = courses
-                    period_not_detail.save()
+                    period.replace_courses(courses)
+                    period.save()
+                invalidate_courses(major.id, period_name)
             continue
 
         courses, is_detail = scrape_courses(
             major_kd_org, period_name, skip_not_detail=True)
 
         if courses:
-            period_detail.courses = courses
-            period_detail.save()
+            period.replace_courses(courses)
+            period.save()
+            invalidate_courses(major.id, period_name)
+
+
+def process_scrape_jobs(lock_seconds, retry_delay, limit=None):
+    """Run claimed scrape jobs until the queue is empty, return the count."""
+    count = 0
+    while limit is None or count < limit:
+        job = ScrapeJob.claim(lock_seconds)
+        if job is None:
+            break
+        try:
+            run_scrape_job(job)
+        except Exception:
+            job.finish(error=traceback.format_exc(limit=5), retry_delay=retry_delay)
+        else:
+            job.finish()
+        click.echo(f"{job.kd_org} {job.period_name}: {job.status}")
+        count += 1
+    return count
+
+
+@cron.cli.command("scrape_worker")
+@click.option("--once", is_flag=True,
+              help="Exit once the queue is empty instead of polling.")
+@click.option("--poll-interval", default=5.0, show_default=True,
+              help="Seconds to wait before checking an empty queue again.")
+def scrape_worker(once, poll_interval):
+    lock_seconds = app.config["SCRAPE_JOB_LOCK_SECONDS"]
+    retry_delay = app.config["SCRAPE_JOB_RETRY_DELAY"]
+    while True:
+        process_scrape_jobs(lock_seconds, retry_delay)
+        if once:
+            break
+        time.sleep(poll_interval)
+
+
+def get_hot_queries():
+    """Query shapes used by request handlers, as (model, filter, sort)."""
+    period_name = app.config["ACTIVE_PERIOD"]
+    return [
+        (Major, {"kd_org": "00.00.00.00"}, None),
+        (User, {"npm": "0000000000"}, None),
+        (Period, {"major_id": ObjectId(), "name": period_name},
+         [("is_detail", -1)]),
+        (Period, {"major_id": {"$in": [ObjectId(), ObjectId()]},
+                  "name": period_name},
+         [("major_id", 1), ("is_detail", -1)]),
+        (PeriodChange, {"period_id": ObjectId(), "revision": {"$gt": 0}},
+         [("revision", 1)]),
+        (UserSchedule, {"user_id": ObjectId(), "deleted": False},
+         [("created_at", -1), ("_id", -1)]),
+        (ScrapeJob, {"major_id": ObjectId(), "period_name": period_name}, None),
+        (ScrapeJob, {"status": "pending"}, [("queued_at", 1)]),
+        (UserScheduleVersion, {"user_schedule_id": ObjectId(),
+                               "version": {"$lte": 10}, "items_hash": {"$ne": None}},
+         [("version", -1)]),
+        (LecturerSchedule, {"period_name": period_name,
+                            "lecturer_key": "budi santoso"}, None),
+    ]
+
+
+def find_plan_stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from find_plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from find_plan_stages(value)
+
+
+@cron.cli.command("ensure_indexes")
+def ensure_indexes():
+    """Create declared indexes and report query shapes doing a COLLSCAN."""
+    failed = False
+    models = (
+        Major, User, Period, PeriodChange, UserSchedule, UserScheduleVersion,
+        LecturerSchedule, ScrapeJob
+    )
+    for model in models:
+        model.ensure_indexes()
+        missing = model.compare_indexes()["missing"]
+        name = model._get_collection_name()
+        if missing:
+            failed = True
+            click.echo(f"{name}: missing indexes {missing}")
+        else:
+            click.echo(f"{name}: indexes ok")
+
+    for model, query, sort in get_hot_queries():
+        name = model._get_collection_name()
+        cursor = model._get_collection().find(query)
+        if sort is not None:
+            cursor = cursor.sort(sort)
+
+        try:
+            plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        except Exception as e:
+            click.echo(f"{name} {sorted(query)}: cannot explain ({e})")
+            continue
+
+        if "COLLSCAN" in find_plan_stages(plan):
+            failed = True
+            click.echo(f"{name} {sorted(query)}: COLLSCAN")
+        else:
+            click.echo(f"{name} {sorted(query)}: uses index")
+
+    if failed:
+        raise click.ClickException("Some indexes are missing or unused")
+
+
+def fill_schedule_times(items):
+    """Store the parsed times on stored schedule item dicts.
+
+    Returns whether any item changed.
+    """
+    changed = False
+    for item in items:
+        times = {
+            "day_index": get_day_index(item.get("day")),
+            "start_minutes": get_minutes(item.get("start")),
+            "end_minutes": get_minutes(item.get("end")),
+        }
+        for key, value in times.items():
+            if value is not None and item.get(key) != value:
+                item[key] = value
+                changed = True
+    return changed
+
+
+def backfill_collection(model, field, get_items, batch_size=500):
+    collection = model._get_collection()
+    requests, updated = [], 0
+    for data in collection.find({}, {field: 1}):
+        value = data.get(field, [])
+        if fill_schedule_times(get_items(value)):
+            requests.append(UpdateOne({"_id": data["_id"]}, {"$set": {field: value}}))
+            updated += 1
+        if len(requests) == batch_size:
+            collection.bulk_write(requests, ordered=False)
+            requests = []
+    if requests:
+        collection.bulk_write(requests, ordered=False)
+    return updated
+
+
+@cron.cli.command("backfill_schedule_times")
+def backfill_schedule_times():
+    """Store parsed days and minutes on schedule items saved without them."""
+    updated = backfill_collection(Period, "courses", lambda courses: [
+        item
+        for course in courses
+        for class_ in course.get("classes", [])
+        for item in class_.get("schedule_items", [])
+    ])
+    click.echo(f"{Period._get_collection_name()}: {updated} documents updated")
+
+    for model in (UserSchedule, ScheduleItemSet):
+        updated = backfill_collection(model, "schedule_items", lambda items: items)
+        click.echo(f"{model._get_collection_name()}: {updated} documents updated")
+
+
+@cron.cli.command("backfill_period_versions")
+def backfill_period_versions():
+    """Re-save Periods stored without a version or pre-compressed payloads."""
+    periods = Period.objects(Q(version=None) | Q(payload_gzip=None)).no_dereference()
+    count = 0
+    for period in periods:
+        try:
+            period.save()
+        except ValidationError as e:
+            click.echo(f"{Period._get_collection_name()} {period.id}: {e}")
+            continue
+        if period.major_id is not None:
+            invalidate_courses(period.major_id.id, period.name)
+        count += 1
+    click.echo(f"{Period._get_collection_name()}: {count} documents updated")
+
+
+@cron.cli.command("rebuild_lecturer_schedules")
+def rebuild_lecturer_schedules():
+    """Rebuild the lecturer timetables of every Period."""
+    periods = Period.objects().exclude(
+        "payload_gzip", "payload_br").as_pymongo()
+    count = 0
+    for data in periods:
+        for course in data.get("courses", []):
+            for class_ in course.get("classes", []):
+                fill_schedule_times(class_.get("schedule_items", []))
+        LecturerSchedule.update_period(data)
+        count += 1
+    click.echo(f"{LecturerSchedule._get_collection_name()}: {count} periods indexed")
+
+
+@cron.cli.command("report_schedule_dedup")
+@click.option("--apply", is_flag=True,
+              help="Move items still embedded in user schedules to shared sets.")
+@click.option("--cache-size", default=1024, show_default=True,
+              help="Item sets kept by the read cache.")
+def report_schedule_dedup(apply, cache_size):
+    """Report the storage saved by sharing identical schedule items."""
+    collection = UserSchedule._get_collection()
+    schedules = collection.find({}, {"schedule_items": 1, "items_hash": 1})
+
+    embedded_bytes = 0
+    reference_bytes = 0
+    set_bytes = {}
+    uses = collections.Counter()
+    requests = []
+    for data in schedules:
+        items = data.get("schedule_items") or []
+        items_hash = data.get("items_hash")
+        if items_hash is None:
+            items_hash = ScheduleItemSet.get_hash(
+                [ScheduleItem.serialize_raw(item) for item in items])
+            if apply:
+                ScheduleItemSet.store([ScheduleItem._from_son(item) for item in items])
+                requests.append(UpdateOne({"_id": data["_id"]}, {
+                    "$set": {"items_hash": items_hash, "item_count": len(items)},
+                    "$unset": {"schedule_items": ""},
+                }))
+        elif not items:
+            items = list(load_schedule_item_set(items_hash))
+
+        size = len(bson.encode({"schedule_items": items}))
+        embedded_bytes += size
+        reference_bytes += len(bson.encode(
+            {"items_hash": items_hash, "item_count": len(items)}))
+        set_bytes[items_hash] = size
+        uses[items_hash] += 1
+
+    if requests:
+        collection.bulk_write(requests, ordered=False)
+
+    count = sum(uses.values())
+    shared_bytes = sum(set_bytes.values()) + reference_bytes
+    saved = embedded_bytes - shared_bytes
+    cached = sum(used for _, used in uses.most_common(cache_size))
+    hot_bytes = sum(set_bytes[items_hash] for items_hash, _ in uses.most_common(cache_size))
+    click.echo(f"{count} user schedules, {len(uses)} distinct item lists")
+    click.echo(f"embedded items: {embedded_bytes} bytes")
+    click.echo(f"shared items:   {shared_bytes} bytes "
+               f"({saved} bytes saved, {saved * 100 // max(embedded_bytes, 1)}%)")
+    click.echo(f"read cache of {cache_size} sets: {hot_bytes} bytes, "
+               f"covers {cached * 100 // max(count, 1)}% of schedules")
+    if apply:
+        click.echo(f"{len(requests)} user schedules moved to shared sets")
@@ -1,14 +1,14 @@
 import functools
-from flask import jsonify, request
+from flask import jsonify
 
-from app.utils import extract_header_data
+from app.utils import get_token_data
 
 
 def require_same_user_id(func):
     @functools.wraps(func)
     def decorated_func(*args, **kwargs):
-        data = extract_header_data(request.headers)
-        if(data['user_id'] == kwargs['user_id']):
+        data = get_token_data()
+        if data is not None and data['user_id'] == kwargs['user_id']:
             return func(*args, **kwargs)
         return jsonify({
             'message': 'Unauthorized. Only the resource owner can access this endpoint'
@@ -19,7 +19,7 @@ def require_same_user_id(func):
 def require_jwt_token(func):
     @functools.wraps(func)
     def decorated_func(*args, **kwargs):
-        data = extract_header_data(request.headers)
+        data = get_token_data()
         if data is None:
             return (jsonify({
                 'message': 'There is no token/token is not valid'
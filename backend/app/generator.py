@@ -0,0 +1,293 @@
+import concurrent.futures
+import itertools
+import multiprocessing
+import threading
+import time
+
+from app.conflicts import SLOT_MINUTES, count_gap_slots, count_slots
+
+
+class ScheduleSearch:
+    """Backtracking search for conflict-free class combinations.
+
+    `courses` is a list of (course name, [(class name, bitmask)]). Classes
+    touching `forbidden` slots are dropped up front. At every step the
+    remaining course with the fewest compatible classes is tried next, and
+    a branch is cut as soon as a remaining course has no compatible class
+    or `max_gap` (minutes of idle time between classes) can no longer be
+    met.
+    """
+
+    def __init__(self, courses, forbidden=0, max_gap=None, deadline=None):
+        self.names = [name for name, _ in courses]
+        self.domains = [
+            [(class_name, mask) for class_name, mask in sections
+             if not mask & forbidden]
+            for _, sections in courses
+        ]
+        # Most slots a course can still fill, to bound the final idle time
+        self.capacity = [
+            max((count_slots(mask) for _, mask in domain), default=0)
+            for domain in self.domains
+        ]
+        self.max_gap_slots = None if max_gap is None else max_gap // SLOT_MINUTES
+        self.deadline = deadline
+        self.timed_out = False
+
+    def is_expired(self):
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.timed_out = True
+        return self.timed_out
+
+    def run(self, chosen=None, mask=0):
+        """Yield timetables as lists of (course name, class name).
+
+        `chosen` maps course positions to class positions already fixed,
+        with `mask` their combined slots.
+        """
+        chosen = dict(chosen or {})
+        remaining = [
+            position for position in range(len(self.domains))
+            if position not in chosen
+        ]
+        for timetable in self._search(chosen, remaining, mask):
+            yield [
+                (self.names[position], self.domains[position][chosen_class][0])
+                for position, chosen_class in sorted(timetable.items())
+            ]
+
+    def _pick_course(self, remaining, mask):
+        best, best_options = None, None
+        for position in remaining:
+            options = [
+                index for index, (_, class_mask) in enumerate(self.domains[position])
+                if not class_mask & mask
+            ]
+            if best_options is None or len(options) < len(best_options):
+                best, best_options = position, options
+                if not options:
+                    break
+        return best, best_options
+
+    def _search(self, chosen, remaining, mask):
+        if self.max_gap_slots is not None:
+            fillable = sum(self.capacity[position] for position in remaining)
+            if count_gap_slots(mask) - fillable > self.max_gap_slots:
+                return
+
+        if not remaining:
+            yield dict(chosen)
+            return
+        if self.is_expired():
+            return
+
+        position, options = self._pick_course(remaining, mask)
+        if not options:
+            return
+
+        rest = [other for other in remaining if other != position]
+        for index in options:
+            chosen[position] = index
+            class_mask = self.domains[position][index][1]
+            yield from self._search(chosen, rest, mask | class_mask)
+            del chosen[position]
+
+
+# Search generation of every slot shared with the worker processes, set
+# by `_init_worker`
+_generations = None
+
+
+def _init_worker(generations):
+    global _generations
+    _generations = generations
+
+
+class SubtreeSearch(ScheduleSearch):
+    """ScheduleSearch run by a pool worker.
+
+    Stopped once the generation of its slot moved on, which happens when
+    the search that submitted it released the slot.
+    """
+
+    def __init__(self, courses, slot, generation, **kwargs):
+        super().__init__(courses, **kwargs)
+        self.slot = slot
+        self.generation = generation
+
+    def is_expired(self):
+        if _generations is not None and _generations[self.slot] != self.generation:
+            return True
+        return super().is_expired()
+
+
+def search_subtree(courses, forbidden, max_gap, expires_at, slot, generation,
+                   chosen, limit):
+    """Return (up to `limit` timetables, timed out) of one search subtree.
+
+    Timetables are tuples of the chosen class position of every course.
+
+    `expires_at` is a wall clock time, as the monotonic clock of the
+    requesting process means nothing here.
+    """
+    deadline = None
+    if expires_at is not None:
+        deadline = time.monotonic() + max(0, expires_at - time.time())
+    search = SubtreeSearch(
+        courses, slot, generation,
+        forbidden=forbidden, max_gap=max_gap, deadline=deadline)
+    mask = 0
+    for position, index in chosen.items():
+        mask |= search.domains[position][index][1]
+    remaining = [
+        position for position in range(len(search.domains))
+        if position not in chosen
+    ]
+    # Class positions pickle much smaller than names
+    timetables = [
+        tuple(timetable[position] for position in range(len(search.domains)))
+        for timetable in itertools.islice(
+            search._search(dict(chosen), remaining, mask), limit)
+    ]
+    return timetables, search.timed_out
+
+
+class SearchPool:
+    """Bounded pool of worker processes for ParallelScheduleSearch.
+
+    Processes are started on first use, so every forked gunicorn worker
+    gets its own pool. Each running search holds one of `slots` generation
+    counters shared with the workers. Releasing the slot increments it,
+    which stops the subtrees of that search still running, even after the
+    slot was taken by the next search.
+    """
+
+    def __init__(self, processes=0, slots=32):
+        self.processes = processes
+        self._generations = multiprocessing.Array("l", slots, lock=False)
+        self._free_slots = list(range(slots))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    initializer=_init_worker,
+                    initargs=(self._generations,)
+                )
+            return self._executor
+
+    def acquire_slot(self):
+        """Return (slot, generation) of a free slot, None if all are taken."""
+        with self._lock:
+            if not self._free_slots:
+                return None
+            slot = self._free_slots.pop(0)
+            return slot, self._generations[slot]
+
+    def release_slot(self, slot):
+        with self._lock:
+            self._generations[slot] += 1
+            self._free_slots.append(slot)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+search_pool = SearchPool()
+
+
+def configure_search_pool(config):
+    search_pool.shutdown()
+    search_pool.processes = config.get("GENERATOR_PROCESSES", 0)
+
+
+class ParallelScheduleSearch(ScheduleSearch):
+    """ScheduleSearch split into subtrees searched in `pool`.
+
+    The tree is split on the courses with the most compatible classes,
+    one course after the other, until there are `SUBTREES_PER_PROCESS`
+    subtrees per pool process. Timetables are yielded as subtrees finish,
+    and the remaining subtrees are cancelled once `limit` timetables were
+    yielded. Falls back to a serial search when every slot of the pool is
+    taken.
+    """
+
+    SUBTREES_PER_PROCESS = 2
+
+    def __init__(self, courses, forbidden=0, max_gap=None, deadline=None,
+                 pool=None, limit=20):
+        super().__init__(courses, forbidden, max_gap, deadline)
+        self.courses = courses
+        self.forbidden = forbidden
+        self.max_gap = max_gap
+        self.pool = pool or search_pool
+        self.limit = limit
+
+    def split(self, target):
+        """Return the `chosen` roots of at least `target` subtrees if possible.
+
+        Courses are fixed widest first, a course with one or two classes
+        would barely split the tree. Conflicting combinations are dropped.
+        """
+        order = sorted(
+            range(len(self.domains)), key=lambda position: -len(self.domains[position]))
+        subtrees = [({}, 0)]
+        for position in order:
+            if len(subtrees) >= target:
+                break
+            subtrees = [
+                ({**chosen, position: index}, mask | class_mask)
+                for chosen, mask in subtrees
+                for index, (_, class_mask) in enumerate(self.domains[position])
+                if not mask & class_mask
+            ]
+        return [chosen for chosen, _ in subtrees]
+
+    def run(self, chosen=None, mask=0):
+        if chosen or not self.domains:
+            yield from itertools.islice(super().run(chosen, mask), self.limit)
+            return
+
+        if self.is_expired():
+            return
+        acquired = self.pool.acquire_slot()
+        if acquired is None:
+            yield from itertools.islice(super().run(), self.limit)
+            return
+
+        slot, generation = acquired
+        expires_at = None
+        if self.deadline is not None:
+            expires_at = time.time() + max(0, self.deadline - time.monotonic())
+        subtrees = self.split(max(1, self.pool.processes) * self.SUBTREES_PER_PROCESS)
+        executor = self.pool.get_executor()
+        futures = [
+            executor.submit(
+                search_subtree, self.courses, self.forbidden, self.max_gap,
+                expires_at, slot, generation, chosen, self.limit
+            )
+            for chosen in subtrees
+        ]
+        count = 0
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                timetables, timed_out = future.result()
+                self.timed_out = self.timed_out or timed_out
+                for timetable in timetables:
+                    yield [
+                        (name, domain[index][0])
+                        for name, domain, index in zip(self.names, self.domains, timetable)
+                    ]
+                    count += 1
+                    if count == self.limit:
+                        return
+        finally:
+            for future in futures:
+                future.cancel()
+            self.pool.release_slot(slot)
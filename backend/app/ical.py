@@ -0,0 +1,107 @@
+from datetime import datetime, time, timedelta
+
+from app.rooms import get_room_name
+from models.period import get_item_times
+
+TIMEZONE = "Asia/Jakarta"
+UTC_OFFSET = timedelta(hours=7)  # WIB, without daylight saving time
+MAX_LINE_OCTETS = 75
+
+
+def escape_text(value):
+    """Escape a TEXT property value (RFC 5545 section 3.3.11)."""
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold_line(line):
+    """Return `line` as CRLF terminated octets folded at 75 octets."""
+    data = line.encode()
+    if len(data) <= MAX_LINE_OCTETS:
+        return data + b"\r\n"
+
+    folded = []
+    current = b""
+    limit = MAX_LINE_OCTETS
+    for char in line:
+        encoded = char.encode()
+        if len(current) + len(encoded) > limit:
+            folded.append(current)
+            current = b""
+            limit = MAX_LINE_OCTETS - 1  # continuation lines start with a space
+        current += encoded
+    folded.append(current)
+    return b"\r\n ".join(folded) + b"\r\n"
+
+
+def format_local(date, minutes):
+    return "{:%Y%m%d}T{:02d}{:02d}00".format(date, minutes // 60, minutes % 60)
+
+
+def format_utc(value):
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def get_first_date(start_date, day_index):
+    """Return the first date on or after `start_date` on weekday `day_index`."""
+    return start_date + timedelta(days=(day_index - start_date.weekday()) % 7)
+
+
+def generate_calendar(user_schedule_id, name, schedule_items, start_date, end_date):
+    """Yield an iCalendar of weekly events for `schedule_items`, in chunks.
+
+    Every item repeats weekly from its first day on or after `start_date`
+    until `end_date`. Items with unparseable times or whose day does not
+    occur in the period are skipped.
+    """
+    stamp = format_utc(datetime.utcnow())
+    until = format_utc(datetime.combine(end_date, time.max) - UTC_OFFSET)
+    yield b"".join(fold_line(line) for line in (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//RISTEK Fasilkom UI//Susun Jadwal//ID",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        "X-WR-CALNAME:" + escape_text(name or "Susun Jadwal"),
+        "X-WR-TIMEZONE:" + TIMEZONE,
+        "BEGIN:VTIMEZONE",
+        "TZID:" + TIMEZONE,
+        "BEGIN:STANDARD",
+        "DTSTART:19700101T000000",
+        "TZOFFSETFROM:+0700",
+        "TZOFFSETTO:+0700",
+        "TZNAME:WIB",
+        "END:STANDARD",
+        "END:VTIMEZONE",
+    ))
+
+    for index, item in enumerate(schedule_items):
+        day, start, end = get_item_times(item)
+        if None in (day, start, end) or end <= start:
+            continue
+        date = get_first_date(start_date, day)
+        if date > end_date:
+            continue
+
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{user_schedule_id}-{index}@susunjadwal",
+            "DTSTAMP:" + stamp,
+            f"DTSTART;TZID={TIMEZONE}:" + format_local(date, start),
+            f"DTEND;TZID={TIMEZONE}:" + format_local(date, end),
+            "RRULE:FREQ=WEEKLY;UNTIL=" + until,
+            "SUMMARY:" + escape_text(item.get("name") or ""),
+        ]
+        room = get_room_name(item.get("room"))
+        if room is not None:
+            lines.append("LOCATION:" + escape_text(room))
+        lines.append("END:VEVENT")
+        yield b"".join(fold_line(line) for line in lines)
+
+    yield fold_line("END:VCALENDAR")
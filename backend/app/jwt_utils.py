@@ -1,5 +1,9 @@
+import time
+
 import jwt
-from flask import current_app as app
+from flask import current_app as app, g, has_app_context
+
+from app.cache import token_cache
 
 
 def encode_token(data):
@@ -7,9 +11,26 @@ def encode_token(data):
 
 
 def decode_token(token):
+    """Return the claims of a valid token, else None.
+
+    Verified tokens are cached, so a token is only verified again once it
+    is evicted or its `exp` claim has passed. Verifications are counted
+    per request in `g.token_decodes`.
+    """
+    if not token:
+        return None
+
+    key = (app.config["SECRET_KEY"], token)
+    data = token_cache.get(key)
+    if data is not None and ("exp" not in data or data["exp"] > time.time()):
+        return dict(data)
+
+    if has_app_context():
+        g.token_decodes = g.get("token_decodes", 0) + 1
     try:
         data = jwt.decode(token, app.config["SECRET_KEY"], algorithm='HS256')
     except:
         return None
 
-    return data
+    token_cache.set(key, data)
+    return dict(data)
@@ -0,0 +1,132 @@
+import bisect
+import threading
+
+from app.search import ActivePeriodIndex
+from models.period import get_item_times
+
+
+def get_room_name(room):
+    """Return the stripped room name, None for missing rooms like "-"."""
+    room = (room or "").strip()
+    if not room or room == "-":
+        return None
+    return room
+
+
+class RoomTimeline:
+    """Classes held in one room on one day, sorted by start minute.
+
+    `max_ends[i]` is the latest end of the first `i + 1` classes, so the
+    classes starting before a window end and the latest of their ends are
+    found with one binary search.
+    """
+
+    def __init__(self, entries):
+        self.entries = sorted(entries, key=lambda entry: entry[:2])
+        self.starts = [start for start, _, _ in self.entries]
+        self.max_ends = []
+        latest = None
+        for _, end, _ in self.entries:
+            latest = end if latest is None else max(latest, end)
+            self.max_ends.append(latest)
+
+    def is_occupied(self, start, end):
+        count = bisect.bisect_left(self.starts, end)
+        return count > 0 and self.max_ends[count - 1] > start
+
+    def find_overlapping(self, start, end):
+        count = bisect.bisect_left(self.starts, end)
+        return [
+            entry for entry in self.entries[:count]
+            if entry[1] > start
+        ]
+
+
+class RoomIndex:
+    """Per room and day timelines of the classes of every indexed Period.
+
+    Replacing a Period only rebuilds the timelines of the rooms and days
+    it used or uses.
+    """
+
+    def __init__(self):
+        self.periods = {}  # period id -> (version, set of (room, day))
+        self.entries = {}  # (room, day) -> {period id: [(start, end, class)]}
+        self.timelines = {}  # (room, day) -> RoomTimeline
+        self.rooms = {}  # room -> number of (room, day) timelines
+        self._lock = threading.RLock()
+
+    def update_period(self, period_id, major_id, version, courses):
+        with self._lock:
+            touched = self._remove_entries(period_id)
+
+            keys = set()
+            for course in courses:
+                for class_ in course.get("classes", []):
+                    occupant = {
+                        "major_id": major_id,
+                        "course": course.get("name"),
+                        "class": class_.get("name"),
+                    }
+                    for item in class_.get("schedule_items", []):
+                        room = get_room_name(item.get("room"))
+                        day, start, end = get_item_times(item)
+                        if room is None or None in (day, start, end) or end <= start:
+                            continue
+                        key = (room, day)
+                        periods = self.entries.setdefault(key, {})
+                        periods.setdefault(period_id, []).append((start, end, occupant))
+                        keys.add(key)
+
+            self.periods[period_id] = (version, keys)
+            self._rebuild(touched | keys)
+
+    def remove_period(self, period_id):
+        with self._lock:
+            self._rebuild(self._remove_entries(period_id))
+
+    def _remove_entries(self, period_id):
+        _, keys = self.periods.pop(period_id, (None, set()))
+        for key in keys:
+            periods = self.entries[key]
+            del periods[period_id]
+            if not periods:
+                del self.entries[key]
+        return keys
+
+    def _rebuild(self, keys):
+        for key in keys:
+            periods = self.entries.get(key)
+            if periods:
+                if key not in self.timelines:
+                    self.rooms[key[0]] = self.rooms.get(key[0], 0) + 1
+                self.timelines[key] = RoomTimeline(
+                    entry for entries in periods.values() for entry in entries)
+            elif self.timelines.pop(key, None) is not None:
+                self.rooms[key[0]] -= 1
+                if not self.rooms[key[0]]:
+                    del self.rooms[key[0]]
+
+    def find_occupied(self, day, start, end):
+        """Return {room: [(start, end, class)]} of classes overlapping the window."""
+        with self._lock:
+            occupied = {}
+            for room in self.rooms:
+                timeline = self.timelines.get((room, day))
+                if timeline is not None and timeline.is_occupied(start, end):
+                    occupied[room] = timeline.find_overlapping(start, end)
+            return occupied
+
+    def find_free(self, day, start, end):
+        """Return the sorted known rooms without a class in the window."""
+        with self._lock:
+            return sorted(
+                room for room in self.rooms
+                if not (
+                    (room, day) in self.timelines
+                    and self.timelines[(room, day)].is_occupied(start, end)
+                )
+            )
+
+
+active_period_rooms = ActivePeriodIndex(RoomIndex)
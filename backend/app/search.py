@@ -0,0 +1,186 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+
+from models.period import Period
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+class SearchIndex:
+    """Inverted index over course names, class names and lecturers.
+
+    Every class of every indexed Period is one document. Periods are
+    indexed separately, so replacing one Period only touches its own
+    documents and tokens.
+    """
+
+    def __init__(self):
+        self.documents = {}  # document id -> class summary
+        self.postings = {}  # token -> set of document ids
+        self.vocabulary = []  # sorted tokens, for prefix lookups
+        self.periods = {}  # period id -> (version, [(document id, tokens)])
+        self._next_id = 0
+        self._lock = threading.RLock()
+
+    def update_period(self, period_id, major_id, version, courses):
+        with self._lock:
+            self.remove_period(period_id)
+
+            document_ids = []
+            for course in courses:
+                course_tokens = tokenize(course.get("name"))
+                for class_ in course.get("classes", []):
+                    document_id = self._next_id
+                    self._next_id += 1
+                    self.documents[document_id] = {
+                        "major_id": major_id,
+                        "course": course.get("name"),
+                        "class": class_.get("name"),
+                        "lecturer": class_.get("lecturer", []),
+                    }
+                    tokens = set(course_tokens)
+                    tokens.update(tokenize(class_.get("name")))
+                    for lecturer in class_.get("lecturer", []):
+                        tokens.update(tokenize(lecturer))
+                    for token in tokens:
+                        self._add_posting(token, document_id)
+                    document_ids.append((document_id, tokens))
+
+            self.periods[period_id] = (version, document_ids)
+
+    def remove_period(self, period_id):
+        with self._lock:
+            _, document_ids = self.periods.pop(period_id, (None, []))
+            for document_id, tokens in document_ids:
+                del self.documents[document_id]
+                for token in tokens:
+                    self._remove_posting(token, document_id)
+
+    def _add_posting(self, token, document_id):
+        posting = self.postings.get(token)
+        if posting is None:
+            posting = self.postings[token] = set()
+            bisect.insort(self.vocabulary, token)
+        posting.add(document_id)
+
+    def _remove_posting(self, token, document_id):
+        posting = self.postings[token]
+        posting.discard(document_id)
+        if not posting:
+            del self.postings[token]
+            del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+
+    def _match_prefix(self, prefix):
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + "\uffff")
+        if end - start == 1:
+            return self.postings[self.vocabulary[start]]
+        return set().union(*(
+            self.postings[token] for token in self.vocabulary[start:end]))
+
+    def search(self, query, limit=20):
+        """Return documents containing every query token, as a prefix."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            matches = None
+            # Longer tokens match fewer documents, intersect those first
+            for token in sorted(set(tokens), key=len, reverse=True):
+                posting = self._match_prefix(token)
+                matches = posting if matches is None else matches & posting
+                if not matches:
+                    return []
+
+            return [
+                self.documents[document_id]
+                for document_id in heapq.nsmallest(limit, matches)
+            ]
+
+
+class ActivePeriodIndex:
+    """Index kept in sync with the active Period of every major.
+
+    `index_class` instances are filled with `update_period(period_id,
+    major_id, version, courses)`, where `courses` are stored courses, and
+    emptied with `remove_period(period_id)`. Periods are compared by
+    version, so only Periods saved since the last refresh are re-indexed.
+    Refreshes happen at most every `interval` seconds, or on the next
+    lookup after `mark_stale()`.
+    """
+
+    def __init__(self, index_class, interval=60):
+        self.index_class = index_class
+        self.interval = interval
+        self.index = index_class()
+        self.period_name = None
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+
+    def mark_stale(self):
+        self._refreshed_at = None
+
+    def refresh(self, period_name):
+        with self._lock:
+            if period_name != self.period_name:
+                self.index = self.index_class()
+                self.period_name = period_name
+
+            active = {}
+            periods = Period.objects(name=period_name).only(
+                "id", "major_id", "is_detail", "version").as_pymongo()
+            for period in periods:
+                current = active.get(period["major_id"])
+                if current is None or period.get("is_detail", False):
+                    active[period["major_id"]] = period
+
+            indexed = self.index.periods
+            wanted = {period["_id"]: period for period in active.values()}
+            for period_id in set(indexed) - set(wanted):
+                self.index.remove_period(period_id)
+
+            changed = [
+                period_id for period_id, period in wanted.items()
+                if (period_id not in indexed)
+                or (indexed[period_id][0] != period.get("version"))
+            ]
+            if changed:
+                documents = Period.objects(id__in=changed).only(
+                    "major_id", "name", "is_detail", "courses", "version").as_pymongo()
+                for data in documents:
+                    self.index.update_period(
+                        data["_id"],
+                        str(data["major_id"]),
+                        data.get("version"),
+                        data.get("courses", [])
+                    )
+
+            self._refreshed_at = time.monotonic()
+
+    def get_index(self, period_name):
+        refreshed_at = self._refreshed_at
+        if (refreshed_at is None or period_name != self.period_name
+                or time.monotonic() - refreshed_at >= self.interval):
+            self.refresh(period_name)
+        return self.index
+
+
+class ActivePeriodSearch(ActivePeriodIndex):
+    """SearchIndex kept in sync with the active Period of every major."""
+
+    def __init__(self, interval=60):
+        super().__init__(SearchIndex, interval)
+
+    def search(self, period_name, query, limit=20):
+        return self.get_index(period_name).search(query, limit=limit)
+
+
+active_period_search = ActivePeriodSearch()
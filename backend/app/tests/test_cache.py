@@ -0,0 +1,48 @@
+from app.cache import LRUCache, courses_cache, invalidate_courses
+
+
+class TestLRUCache:
+    """Test bounded LRU cache used for serialized responses"""
+
+    def test_get_and_set(self):
+        cache = LRUCache(maxsize=2)
+        assert cache.get("a") is None
+
+        cache.set("a", b"1")
+        assert cache.get("a") == b"1"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    def test_expired_entry_is_a_miss(self):
+        cache = LRUCache(maxsize=2, ttl=0)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_invalidate_courses(self):
+        courses_cache.set(("major-1", "2019-2"), b"{}")
+        courses_cache.set(("major-1", "2020-1"), b"{}")
+        courses_cache.set(("major-2", "2019-2"), b"{}")
+
+        invalidate_courses("major-1", "2019-2")
+        assert courses_cache.get(("major-1", "2019-2")) is None
+        assert courses_cache.get(("major-1", "2020-1")) is not None
+
+        invalidate_courses("major-1")
+        assert courses_cache.get(("major-1", "2020-1")) is None
+        assert courses_cache.get(("major-2", "2019-2")) is not None
+
+        courses_cache.clear()
@@ -0,0 +1,123 @@
+from app import app
+from app.conflicts import (
+    ScheduleMasks,
+    describe_mask,
+    get_item_mask,
+    get_schedule_mask
+)
+from models.period import Class, Course, Period, ScheduleItem
+from .utils import BASE_PATH
+
+
+def item(day, start, end):
+    return {"day": day, "start": start, "end": end, "room": "2.2304"}
+
+
+PERIOD = {
+    "name": "2019-2",
+    "is_detail": True,
+    "courses": [
+        {"name": "Anum", "classes": [
+            {"name": "A", "schedule_items": [item("Senin", "08.00", "09.40")]},
+            {"name": "B", "schedule_items": [item("Rabu", "13.00", "14.40")]},
+        ]},
+        {"name": "Basdat", "classes": [
+            {"name": "A", "schedule_items": [
+                item("Senin", "09.40", "11.20"), item("Rabu", "14.00", "15.40")]},
+        ]},
+        {"name": "Kalkulus", "classes": [
+            {"name": "A", "schedule_items": [item("Senin", "08.50", "10.00")]},
+        ]},
+    ],
+}
+
+
+class TestScheduleMasks:
+    """Test bitmask based schedule conflict detection"""
+
+    def test_masks(self):
+        assert get_item_mask(None, 480, 580) == 0
+        assert get_item_mask(0, 580, 480) == 0
+        assert get_item_mask(0, 480, 490) == 0b11 << 96
+        assert get_schedule_mask([item("Senin", "08.00", "09.40")]) & \
+            get_schedule_mask([item("Senin", "09.40", "11.20")]) == 0
+
+    def test_describe_mask(self):
+        mask = get_schedule_mask([
+            item("Senin", "08.00", "09.40"), item("Rabu", "13.00", "14.40")])
+        assert describe_mask(mask) == [
+            {"day": "Senin", "start": "08.00", "end": "09.40"},
+            {"day": "Rabu", "start": "13.00", "end": "14.40"},
+        ]
+
+    def test_find_conflicts(self):
+        masks = ScheduleMasks(PERIOD)
+        assert masks.find_conflicts([("Anum", "A"), ("Basdat", "A")]) == []
+
+        conflicts = masks.find_conflicts([
+            ("Anum", "A"), ("Anum", "B"), ("Basdat", "A"), ("Kalkulus", "A")])
+        pairs = [(first, second) for first, second, _ in conflicts]
+        assert pairs == [
+            (("Anum", "A"), ("Kalkulus", "A")),
+            (("Anum", "B"), ("Basdat", "A")),
+            (("Basdat", "A"), ("Kalkulus", "A")),
+        ]
+        assert describe_mask(conflicts[0][2]) == [
+            {"day": "Senin", "start": "08.50", "end": "09.40"}]
+
+
+class TestConflictEndpoint:
+    """Test schedule conflict endpoint"""
+
+    def test_find_conflicts(self, auth_client):
+        client, user = auth_client
+        Period.objects().create(
+            major_id=user.major.id,
+            name=app.config["ACTIVE_PERIOD"],
+            is_detail=True,
+            courses=[
+                Course(name=course["name"], classes=[
+                    Class(name=class_["name"], schedule_items=[
+                        ScheduleItem(**schedule_item)
+                        for schedule_item in class_["schedule_items"]])
+                    for class_ in course["classes"]])
+                for course in PERIOD["courses"]
+            ],
+        )
+
+        url = '{}/conflicts'.format(BASE_PATH)
+        res = client.post(url, json={
+            'major_id': str(user.major.id),
+            'classes': [
+                {'course': 'Anum', 'class': 'B'},
+                {'course': 'Basdat', 'class': 'A'},
+            ],
+        })
+        assert res.status_code == 200
+        assert res.get_json()['conflicts'] == [{
+            'classes': [
+                {'course': 'Anum', 'class': 'B'},
+                {'course': 'Basdat', 'class': 'A'},
+            ],
+            'overlap': [{'day': 'Rabu', 'start': '14.00', 'end': '14.40'}],
+        }]
+
+        res = client.post(url, json={
+            'major_id': str(user.major.id),
+            'classes': [{'course': 'Anum', 'class': 'Z'}],
+        })
+        assert res.status_code == 400
+
+        res = client.post(url, json={'major_id': 'invalid', 'classes': []})
+        assert res.status_code == 400
+        res = client.post(url, json={'major_id': str(user.id), 'classes': []})
+        assert res.status_code == 404
+        res = client.post(url, json={
+            'major_id': str(user.major.id), 'classes': ['Anum']})
+        assert res.status_code == 400
+        res = client.post(url, json={
+            'major_id': str(user.major.id), 'classes': [{'course': ['Anum'], 'class': 'A'}]})
+        assert res.status_code == 400
+        res = client.post(url, json={
+            'major_id': str(user.major.id), 'classes': [{'course': 'Anum'}]})
+        assert res.status_code == 400
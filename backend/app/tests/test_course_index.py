@@ -0,0 +1,117 @@
+from app.course_index import CourseIndex
+
+
+def make_class(name, lecturers, *items):
+    return {
+        "name": name,
+        "lecturer": lecturers,
+        "schedule_items": [
+            {"day": day, "start": start, "end": end, "room": "2.2304"}
+            for day, start, end in items
+        ],
+    }
+
+
+PERIOD = {
+    "name": "2019-2",
+    "is_detail": True,
+    "courses": [
+        {
+            "name": "Analisis Numerik",
+            "credit": 3,
+            "term": 6,
+            "classes": [
+                make_class("Anum - A", ["Budi"], ("Senin", "08.00", "09.40")),
+                make_class("Anum - B", ["Siti"], ("Selasa", "13.00", "14.40")),
+            ],
+        },
+        {
+            "name": "Basis Data",
+            "credit": 4,
+            "term": 3,
+            "classes": [
+                make_class("Basdat - A", ["Budi", "Ani"],
+                           ("Senin", "10.00", "11.40"), ("Rabu", "10.00", "11.40")),
+            ],
+        },
+        {
+            "name": "Basis Data Lanjut",
+            "credit": 3,
+            "term": 6,
+            "classes": [
+                make_class("BDL - A", ["Ani"], ("Jumat", "16.00", "17.40")),
+            ],
+        },
+    ],
+}
+
+
+def class_names(courses):
+    return [class_["name"] for course in courses for class_ in course["classes"]]
+
+
+class TestCourseIndex:
+    """Test in-memory filtering and pagination over a period"""
+
+    def test_without_filters(self):
+        index = CourseIndex(PERIOD)
+        assert index.search() is None
+
+        courses, next_cursor = index.get_page()
+        assert courses == PERIOD["courses"]
+        assert next_cursor is None
+
+    def test_course_filters(self):
+        index = CourseIndex(PERIOD)
+
+        courses, _ = index.get_page(index.search(term=6, credit=3))
+        assert [course["name"] for course in courses] == [
+            "Analisis Numerik", "Basis Data Lanjut"]
+
+        courses, _ = index.get_page(index.search(name="basis"))
+        assert [course["name"] for course in courses] == [
+            "Basis Data", "Basis Data Lanjut"]
+
+    def test_class_filters(self):
+        index = CourseIndex(PERIOD)
+
+        courses, _ = index.get_page(index.search(day=0))
+        assert class_names(courses) == ["Anum - A", "Basdat - A"]
+
+        courses, _ = index.get_page(index.search(lecturer="bu"))
+        assert class_names(courses) == ["Anum - A", "Basdat - A"]
+
+        courses, _ = index.get_page(index.search(start=10 * 60, end=15 * 60))
+        assert class_names(courses) == ["Anum - B", "Basdat - A"]
+
+        courses, _ = index.get_page(index.search(lecturer="ani", term=6))
+        assert class_names(courses) == ["BDL - A"]
+
+        assert index.search(lecturer="nobody") == set()
+
+    def test_pagination(self):
+        index = CourseIndex(PERIOD)
+
+        courses, next_cursor = index.get_page(limit=2)
+        assert [course["name"] for course in courses] == [
+            "Analisis Numerik", "Basis Data"]
+        assert next_cursor == 2
+
+        courses, next_cursor = index.get_page(cursor=next_cursor, limit=2)
+        assert [course["name"] for course in courses] == ["Basis Data Lanjut"]
+        assert next_cursor is None
+
+        classes = index.search(lecturer="ani")
+        courses, next_cursor = index.get_page(classes, limit=1)
+        assert class_names(courses) == ["Basdat - A"]
+        courses, next_cursor = index.get_page(classes, cursor=next_cursor, limit=1)
+        assert class_names(courses) == ["BDL - A"]
+        assert next_cursor is None
+
+    def test_summaries_and_course_lookup(self):
+        index = CourseIndex(PERIOD)
+
+        assert index.summaries[1] == {
+            "name": "Basis Data", "credit": 4, "term": 3, "class_count": 1}
+        assert index.get_course("Basis Data") == PERIOD["courses"][1]
+        assert index.get_course("Unknown") is None
@@ -0,0 +1,237 @@
+from datetime import datetime, timedelta
+
+from app import app, utils
+from models.lecturer_schedule import LecturerSchedule
+from models.period import Period
+from models.scrape_job import ScrapeJob
+from models.user_schedule import ScheduleItemSet, UserSchedule
+from .utils import BASE_PATH
+
+
+class TestEnsureIndexes:
+    """Test `flask cron ensure_indexes` command"""
+
+    def test_ensure_indexes(self, mongo):
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=["cron", "ensure_indexes"])
+
+        assert result.exit_code == 0, result.output
+        assert "period: indexes ok" in result.output
+        assert "user_schedule: indexes ok" in result.output
+
+        assert not Period.compare_indexes()["missing"]
+        index_keys = [
+            index["key"]
+            for index in UserSchedule._get_collection().index_information().values()
+        ]
+        assert [("user_id", 1), ("created_at", -1), ("_id", -1)] in index_keys
+
+
+class TestBackfillScheduleTimes:
+    """Test `flask cron backfill_schedule_times` command"""
+
+    def test_backfill_schedule_times(self, mongo):
+        item = {"day": "Senin", "start": "08.00", "end": "09.40", "room": "2.2304"}
+        period_id = Period._get_collection().insert_one({
+            "name": "2019-2",
+            "courses": [{"name": "Anum", "classes": [
+                {"name": "Anum - A", "schedule_items": [dict(item)]}]}],
+        }).inserted_id
+        schedule_id = UserSchedule._get_collection().insert_one({
+            "name": "Jadwal",
+            "schedule_items": [dict(item, name="Anum - A"), {"day": "?"}],
+        }).inserted_id
+
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=["cron", "backfill_schedule_times"])
+        assert result.exit_code == 0, result.output
+        assert "period: 1 documents updated" in result.output
+        assert "user_schedule: 1 documents updated" in result.output
+
+        period = Period.objects(id=period_id).first()
+        stored = period.courses[0].classes[0].schedule_items[0]
+        assert (stored.day_index, stored.start_minutes, stored.end_minutes) == (0, 480, 580)
+        user_schedule = UserSchedule.objects(id=schedule_id).first()
+        stored = user_schedule.schedule_items[0]
+        assert (stored.day_index, stored.start_minutes, stored.end_minutes) == (0, 480, 580)
+        assert user_schedule.schedule_items[1].day_index is None
+
+        result = runner.invoke(args=["cron", "backfill_schedule_times"])
+        assert "period: 0 documents updated" in result.output
+
+
+class TestBackfillPeriodVersions:
+    """Test `flask cron backfill_period_versions` command"""
+
+    def test_backfill_period_versions(self, mongo):
+        period_id = Period._get_collection().insert_one({
+            "name": "2019-2",
+            "courses": [{"name": "Anum", "classes": [{"name": "Anum - A"}]}],
+        }).inserted_id
+        Period.objects().create(name="2019-2", courses=[])
+
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=["cron", "backfill_period_versions"])
+        assert result.exit_code == 0, result.output
+        assert "period: 1 documents updated" in result.output
+
+        period = Period.objects(id=period_id).first()
+        assert period.version is not None
+        assert period.payload_gzip is not None
+
+        result = runner.invoke(args=["cron", "backfill_period_versions"])
+        assert "period: 0 documents updated" in result.output
+
+
+class TestRebuildLecturerSchedules:
+    """Test `flask cron rebuild_lecturer_schedules` command"""
+
+    def test_rebuild_lecturer_schedules(self, mongo):
+        Period._get_collection().insert_one({
+            "name": "2019-2",
+            "courses": [{"name": "Anum", "classes": [{
+                "name": "Anum - A",
+                "lecturer": ["Budi"],
+                "schedule_items": [{"day": "Senin", "start": "08.00", "end": "09.40"}],
+            }]}],
+        })
+
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=["cron", "rebuild_lecturer_schedules"])
+        assert result.exit_code == 0, result.output
+        assert "1 periods indexed" in result.output
+
+        schedule = LecturerSchedule.objects(lecturer_key="budi").first()
+        assert schedule.classes[0]["schedule_items"][0]["start_minutes"] == 480
+
+
+class TestReportScheduleDedup:
+    """Test `flask cron report_schedule_dedup` command"""
+
+    def test_report_and_apply(self, mongo):
+        items = [
+            {"name": "Basdat - A", "day": "Senin", "start": "08.00", "end": "09.40"},
+            {"name": "Anum - A", "day": "Rabu", "start": "10.00", "end": "11.40"},
+        ]
+        collection = UserSchedule._get_collection()
+        legacy_ids = [
+            collection.insert_one({"name": "Jadwal", "schedule_items": items}).inserted_id
+            for _ in range(3)
+        ]
+
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=["cron", "report_schedule_dedup"])
+        assert result.exit_code == 0, result.output
+        assert "3 user schedules, 1 distinct item lists" in result.output
+        assert "covers 100% of schedules" in result.output
+        assert len(ScheduleItemSet.objects()) == 0
+
+        result = runner.invoke(args=["cron", "report_schedule_dedup", "--apply"])
+        assert result.exit_code == 0, result.output
+        assert "3 user schedules moved to shared sets" in result.output
+        assert len(ScheduleItemSet.objects()) == 1
+
+        user_schedule = UserSchedule.objects(id=legacy_ids[0]).first()
+        assert user_schedule.item_count == 2
+        assert [item.serialize() for item in user_schedule.schedule_items] == [
+            {**item, "room": None} for item in items]
+        assert "schedule_items" not in collection.find_one({"_id": legacy_ids[1]})
+
+        result = runner.invoke(args=["cron", "report_schedule_dedup"])
+        assert "3 user schedules, 1 distinct item lists" in result.output
+
+
+class TestScrapeWorker:
+    """Test login queued scrapes and `flask cron scrape_worker` command"""
+
+    sso_profile = {
+        "username": "nama.user",
+        "attributes": {
+            "npm": "1701234567",
+            "ldap_cn": "NAMA USER",
+            "study_program": "Ilmu Komputer",
+            "kd_org": "01.00.12.01",
+        },
+    }
+
+    def test_scrape_worker(self, mongo, monkeypatch):
+        scraped = []
+
+        def scrape_courses(kd_org, period_name, skip_not_detail=False):
+            scraped.append(kd_org)
+            if len(scraped) == 1:
+                raise ConnectionError("SIAK is down")
+            return [{"name": "Anum", "classes": []}], True
+
+        monkeypatch.setattr(utils, "scrape_courses", scrape_courses)
+        with app.app_context():
+            result = utils.process_sso_profile(self.sso_profile)
+        assert result["period_ready"] is False
+        assert scraped == []  # login does not wait for the scrape
+
+        major_id = result["major_id"]
+        job = ScrapeJob.objects(major_id=major_id).first()
+        assert job.status == "pending"
+
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=["cron", "scrape_worker", "--once"])
+        assert result.exit_code == 0, result.output
+        job.reload()
+        # The failed attempt is retried later, not while SIAK is still down
+        assert job.status == "pending"
+        assert job.queued_at > datetime.now() + timedelta(seconds=30)
+        runner.invoke(args=["cron", "scrape_worker", "--once"])
+        assert scraped == ["01.00.12.01"]
+
+        job.update(set__queued_at=datetime.now())
+        result = runner.invoke(args=["cron", "scrape_worker", "--once"])
+        assert result.exit_code == 0, result.output
+        job.reload()
+        assert job.status == "done"
+        assert job.attempts == 2
+        assert scraped == ["01.00.12.01"] * 2
+
+        period = Period.objects(major_id=major_id).first()
+        assert period.is_detail
+        assert [course.name for course in period.courses] == ["Anum"]
+
+        with app.app_context():
+            assert utils.process_sso_profile(self.sso_profile)["period_ready"] is True
+
+    def test_unsupported_major(self, mongo, monkeypatch):
+        monkeypatch.setattr(
+            utils, "scrape_courses", lambda *args, **kwargs: ([], False))
+        with app.app_context():
+            result = utils.process_sso_profile(self.sso_profile)
+        assert result["period_ready"] is False
+        assert result["scrape_job"]["status"] == "pending"
+        assert result["major_name"] == "Ilmu Komputer"
+
+        runner = app.test_cli_runner()
+        runner.invoke(args=["cron", "scrape_worker", "--once"])
+
+        # Logins after a scrape without courses keep the old error response
+        with app.app_context():
+            result = utils.process_sso_profile(self.sso_profile)
+        assert result == {"err": True, "major_name": "Ilmu Komputer"}
+
+    def test_period_status(self, auth_client):
+        client, user = auth_client
+        url = '{}/majors/{}/period_status'.format(BASE_PATH, user.major.id)
+
+        res = client.get(url)
+        assert res.status_code == 200
+        assert res.get_json() == {'ready': False, 'is_detail': None, 'job': None}
+
+        ScrapeJob.enqueue(user.major, app.config["ACTIVE_PERIOD"])
+        res = client.get(url)
+        assert res.get_json()['job']['status'] == 'pending'
+
+        Period.objects().create(
+            major_id=user.major, name=app.config["ACTIVE_PERIOD"], is_detail=True)
+        res = client.get(url)
+        assert res.get_json()['ready'] is True
+        assert res.get_json()['is_detail'] is True
+
+        res = client.get('{}/majors/invalid/period_status'.format(BASE_PATH))
+        assert res.status_code == 404
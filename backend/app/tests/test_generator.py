@@ -0,0 +1,203 @@
+import json
+import time
+
+from app import app
+from app.conflicts import get_schedule_mask, get_window_mask
+from app import generator
+from app.generator import ParallelScheduleSearch, ScheduleSearch, SearchPool
+from models.period import Class, Course, Period, ScheduleItem
+from .utils import BASE_PATH
+
+
+def section(name, *items):
+    return (name, get_schedule_mask([
+        {"day": day, "start": start, "end": end} for day, start, end in items
+    ]))
+
+
+COURSES = [
+    ("Anum", [
+        section("Anum - A", ("Senin", "08.00", "09.40")),
+        section("Anum - B", ("Jumat", "13.00", "14.40")),
+    ]),
+    ("Basdat", [
+        section("Basdat - A", ("Senin", "08.00", "09.40")),
+        section("Basdat - B", ("Senin", "13.00", "14.40")),
+    ]),
+    ("Kalkulus", [
+        section("Kalkulus - A", ("Senin", "10.00", "11.40")),
+    ]),
+]
+
+
+class TestScheduleSearch:
+    """Test backtracking schedule generator"""
+
+    def test_enumerates_conflict_free_timetables(self):
+        timetables = list(ScheduleSearch(COURSES).run())
+        assert sorted(timetables) == [
+            [("Anum", "Anum - A"), ("Basdat", "Basdat - B"), ("Kalkulus", "Kalkulus - A")],
+            [("Anum", "Anum - B"), ("Basdat", "Basdat - A"), ("Kalkulus", "Kalkulus - A")],
+            [("Anum", "Anum - B"), ("Basdat", "Basdat - B"), ("Kalkulus", "Kalkulus - A")],
+        ]
+
+    def test_no_timetable_when_a_course_always_clashes(self):
+        courses = COURSES + [("Statprob", [section("Statprob - A", ("Senin", "10.30", "12.00"))])]
+        assert list(ScheduleSearch(courses).run()) == []
+
+    def test_preferences(self):
+        search = ScheduleSearch(COURSES, forbidden=get_window_mask([4]))
+        assert list(search.run()) == [
+            [("Anum", "Anum - A"), ("Basdat", "Basdat - B"), ("Kalkulus", "Kalkulus - A")]]
+
+        search = ScheduleSearch(COURSES, forbidden=get_window_mask(before=10 * 60))
+        assert list(search.run()) == [
+            [("Anum", "Anum - B"), ("Basdat", "Basdat - B"), ("Kalkulus", "Kalkulus - A")]]
+
+        # Basdat - B leaves 80 idle minutes on Monday
+        search = ScheduleSearch(COURSES, max_gap=30)
+        assert list(search.run()) == [
+            [("Anum", "Anum - B"), ("Basdat", "Basdat - A"), ("Kalkulus", "Kalkulus - A")]]
+
+    def test_deadline(self):
+        search = ScheduleSearch(COURSES, deadline=time.monotonic())
+        assert list(search.run()) == []
+        assert search.timed_out
+
+
+class TestParallelScheduleSearch:
+    """Test schedule generator split over a process pool"""
+
+    def setup_method(self):
+        self.pool = SearchPool(processes=2, slots=2)
+
+    def teardown_method(self):
+        self.pool.shutdown()
+
+    def test_same_timetables_as_serial_search(self):
+        search = ParallelScheduleSearch(COURSES, pool=self.pool)
+        assert sorted(search.run()) == sorted(ScheduleSearch(COURSES).run())
+        assert not search.timed_out
+
+        search = ParallelScheduleSearch(COURSES, max_gap=30, pool=self.pool)
+        assert list(search.run()) == [
+            [("Anum", "Anum - B"), ("Basdat", "Basdat - A"), ("Kalkulus", "Kalkulus - A")]]
+
+    def test_stops_at_limit(self):
+        search = ParallelScheduleSearch(COURSES, pool=self.pool, limit=2)
+        assert len(list(search.run())) == 2
+        assert sorted(self.pool._free_slots) == [0, 1]
+
+    def test_serial_when_no_slot_is_free(self):
+        slots = [self.pool.acquire_slot(), self.pool.acquire_slot()]
+        search = ParallelScheduleSearch(COURSES, pool=self.pool)
+        assert len(list(search.run())) == 3
+        assert self.pool._executor is None
+        for slot, _ in slots:
+            self.pool.release_slot(slot)
+
+    def test_split_widest_courses_first(self):
+        courses = [
+            ("Kalkulus", [section("Kalkulus - A", ("Senin", "10.00", "11.40"))]),
+            ("Anum", [
+                section(f"Anum - {day}", (day, "13.00", "14.40"))
+                for day in ("Senin", "Selasa", "Rabu")
+            ]),
+            ("Basdat", [
+                section(f"Basdat - {day}", (day, "13.00", "14.40"))
+                for day in ("Senin", "Selasa", "Rabu", "Kamis")
+            ]),
+        ]
+        search = ParallelScheduleSearch(courses, pool=self.pool)
+        assert search.split(4) == [{2: index} for index in range(4)]
+        # Conflicting combinations of two courses are not submitted
+        subtrees = search.split(5)
+        assert len(subtrees) == 4 * 3 - 3
+        assert all(chosen[1] != chosen[2] for chosen in subtrees)
+        assert sorted(search.run()) == sorted(ScheduleSearch(courses).run())
+
+    def test_released_slot_cancels_its_subtrees(self):
+        slot, generation = self.pool.acquire_slot()
+        self.pool.release_slot(slot)
+        # The slot is taken again, subtrees of the earlier search stay stopped
+        self.pool.acquire_slot()
+        assert self.pool.acquire_slot() == (slot, generation + 1)
+
+        generator._init_worker(self.pool._generations)
+        try:
+            stale = generator.SubtreeSearch(COURSES, slot, generation)
+            current = generator.SubtreeSearch(COURSES, slot, generation + 1)
+            assert stale.is_expired()
+            assert not current.is_expired()
+        finally:
+            generator._init_worker(None)
+
+    def test_deadline(self):
+        search = ParallelScheduleSearch(
+            COURSES, pool=self.pool, deadline=time.monotonic())
+        assert list(search.run()) == []
+        assert search.timed_out
+
+
+class TestGeneratorEndpoint:
+    """Test schedule generator endpoint"""
+
+    def test_generate_schedules(self, auth_client):
+        client, user = auth_client
+        Period.objects().create(
+            major_id=user.major.id,
+            name=app.config["ACTIVE_PERIOD"],
+            is_detail=True,
+            courses=[
+                Course(name="Anum", classes=[
+                    Class(name="Anum - A", schedule_items=[
+                        ScheduleItem(day="Senin", start="08.00", end="09.40")]),
+                    Class(name="Anum - B", schedule_items=[
+                        ScheduleItem(day="Jumat", start="08.00", end="09.40")]),
+                ]),
+                Course(name="Basdat", classes=[
+                    Class(name="Basdat - A", schedule_items=[
+                        ScheduleItem(day="Senin", start="08.00", end="09.40")]),
+                ]),
+            ],
+        )
+
+        url = '{}/schedules:generate'.format(BASE_PATH)
+        res = client.post(url, json={
+            'major_id': str(user.major.id),
+            'courses': ['Anum', 'Basdat'],
+        })
+        assert res.status_code == 200
+        assert res.mimetype == 'application/x-ndjson'
+        lines = [json.loads(line) for line in res.data.decode().splitlines()]
+        assert lines == [
+            {
+                'classes': [
+                    {'course': 'Anum', 'class': 'Anum - B'},
+                    {'course': 'Basdat', 'class': 'Basdat - A'},
+                ],
+                'gap_minutes': 0,
+            },
+            {'done': True, 'count': 1, 'timed_out': False},
+        ]
+
+        res = client.post(url, json={
+            'major_id': str(user.major.id),
+            'courses': ['Anum', 'Basdat'],
+            'preferences': {'free_days': ['Jumat']},
+        })
+        lines = [json.loads(line) for line in res.data.decode().splitlines()]
+        assert lines == [{'done': True, 'count': 0, 'timed_out': False}]
+
+        res = client.post(url, json={
+            'major_id': str(user.major.id),
+            'courses': ['Kalkulus'],
+        })
+        assert res.status_code == 400
+
+        for body in (
+            {'major_id': {'$ne': None}, 'courses': ['Anum']},
+            {'major_id': str(user.major.id), 'courses': [{'name': 'Anum'}]},
+            {'major_id': str(user.major.id), 'courses': ['Anum'], 'preferences': ['Jumat']},
+        ):
+            assert client.post(url, json=body).status_code == 400
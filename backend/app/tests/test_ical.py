@@ -0,0 +1,45 @@
+from datetime import date
+
+from app.ical import escape_text, fold_line, generate_calendar, get_first_date
+
+
+class TestCalendar:
+    """Test iCalendar export of schedule items"""
+
+    def test_escape_and_fold(self):
+        assert escape_text("A6.09; Ged, Baru\\n") == "A6.09\\; Ged\\, Baru\\\\n"
+
+        line = "SUMMARY:" + "Pengantar Sistem Dijital " * 5
+        folded = fold_line(line)
+        parts = folded[:-2].split(b"\r\n")
+        assert all(len(part) <= 75 for part in parts)
+        assert all(part.startswith(b" ") for part in parts[1:])
+        assert b"".join(part[1:] if i else part for i, part in enumerate(parts)) \
+            == line.encode()
+
+    def test_first_date(self):
+        monday = date(2019, 2, 11)
+        assert get_first_date(monday, 0) == monday
+        assert get_first_date(monday, 4) == date(2019, 2, 15)
+        assert get_first_date(date(2019, 2, 13), 0) == date(2019, 2, 18)
+
+    def test_generate_calendar(self):
+        items = [
+            {"name": "Basdat - A", "day": "Jumat", "start": "13.00", "end": "14.40",
+             "room": "2.2304"},
+            {"name": "Asistensi", "day": "Sabtu", "start": "08.00", "end": "09.00",
+             "room": "-"},
+            {"name": "Broken", "day": "Senin", "start": "??", "end": "09.00", "room": None},
+        ]
+        body = b"".join(generate_calendar(
+            "5fdbb1a6bbc4000000000000", "Jadwal", items,
+            date(2019, 2, 11), date(2019, 2, 15)
+        )).decode()
+
+        # Saturday does not occur before the period ends
+        assert body.count("BEGIN:VEVENT") == 1
+        assert "DTSTART;TZID=Asia/Jakarta:20190215T130000\r\n" in body
+        assert "DTEND;TZID=Asia/Jakarta:20190215T144000\r\n" in body
+        assert "RRULE:FREQ=WEEKLY;UNTIL=20190215T165959Z\r\n" in body
+        assert "LOCATION:2.2304\r\n" in body
+        assert "UID:5fdbb1a6bbc4000000000000-0@susunjadwal\r\n" in body
@@ -0,0 +1,53 @@
+import time
+
+import jwt
+from flask import g
+
+from app import app
+from app.cache import token_cache
+from app.jwt_utils import decode_token
+from .utils import BASE_PATH
+
+
+class TestDecodeToken:
+    """Test claims decoding, once per request and cached across requests"""
+
+    def test_verified_tokens_are_cached(self):
+        token_cache.clear()
+        with app.app_context():
+            token = jwt.encode(
+                {"user_id": "1"}, app.config["SECRET_KEY"], algorithm="HS256").decode()
+            assert decode_token(token) == {"user_id": "1"}
+            assert decode_token(token) == {"user_id": "1"}
+            assert g.token_decodes == 1
+
+            assert decode_token(token + "x") is None
+            assert decode_token(token + "x") is None
+            assert g.token_decodes == 3  # invalid tokens are never cached
+
+    def test_expired_token_is_verified_again(self):
+        token_cache.clear()
+        with app.app_context():
+            token = jwt.encode(
+                {"user_id": "1", "exp": int(time.time()) - 1},
+                app.config["SECRET_KEY"], algorithm="HS256").decode()
+            key = (app.config["SECRET_KEY"], token)
+            token_cache.set(key, {"user_id": "1", "exp": int(time.time()) - 1})
+            assert decode_token(token) is None
+            assert g.token_decodes == 1
+
+    def test_decoded_once_per_request(self, auth_client):
+        client, user = auth_client
+        token_cache.clear()
+
+        res = client.get('{}/users/{}/user_schedules'.format(BASE_PATH, user.id))
+        assert res.status_code == 200
+        assert g.token_data['user_id'] == str(user.id)
+        assert g.token_decodes == 1
+
+        res = client.get('{}/users/{}/user_schedules'.format(BASE_PATH, user.id))
+        assert res.status_code == 200
+        assert 'token_decodes' not in g
+
+        res = client.get('{}/users/{}/user_schedules'.format(BASE_PATH, 'someone-else'))
+        assert res.status_code == 401
@@ -0,0 +1,88 @@
+from app import app
+from app.conflicts import find_double_bookings
+from models.major import Major
+from models.period import Class, Course, Period, ScheduleItem
+from .utils import BASE_PATH
+
+
+def make_class(major_id, name, *items):
+    return {
+        "major_id": major_id,
+        "course": name.split(" - ")[0],
+        "class": name,
+        "schedule_items": [
+            {"day": day, "start": start, "end": end, "room": room}
+            for day, start, end, room in items
+        ],
+    }
+
+
+class TestDoubleBookings:
+    """Test overlapping classes of one lecturer across majors"""
+
+    def test_find_double_bookings(self):
+        classes = [
+            make_class("ilkom", "Basdat - A", ("Senin", "08.00", "09.40", "2.2304")),
+            # Same class listed by another major
+            make_class("si", "Basdat - A", ("Senin", "08.00", "09.40", "2.2304")),
+            make_class("si", "Anum - A", ("Senin", "09.00", "10.40", "3.3111")),
+            # Touches the end of Anum - A
+            make_class("ti", "Statprob - A", ("Senin", "10.40", "12.00", "A6.09")),
+            # Clash within a single major
+            make_class("ti", "Matdis - A", ("Senin", "11.00", "11.30", "A6.10")),
+        ]
+
+        bookings = find_double_bookings(classes)
+        assert bookings == [{
+            "day": "Senin",
+            "start": "09.00",
+            "end": "09.40",
+            "classes": [
+                {"major_id": "ilkom", "course": "Basdat", "class": "Basdat - A", "room": "2.2304"},
+                {"major_id": "si", "course": "Basdat", "class": "Basdat - A", "room": "2.2304"},
+                {"major_id": "si", "course": "Anum", "class": "Anum - A", "room": "3.3111"},
+            ],
+        }]
+
+
+class TestLecturerTimetableEndpoint:
+    """Test lecturer timetable across every major"""
+
+    def create_period(self, kd_org, class_name, start, is_detail=True):
+        major = Major.objects(kd_org=kd_org).first()
+        if major is None:
+            major = Major.objects().create(name=kd_org, kd_org=kd_org)
+        return Period.objects().create(
+            major_id=major,
+            name=app.config["ACTIVE_PERIOD"],
+            is_detail=is_detail,
+            courses=[Course(name="Basis Data", classes=[
+                Class(name=class_name, lecturer=["Budi Santoso"], schedule_items=[
+                    ScheduleItem(day="Senin", start=start, end="09.40", room="2.2304")
+                ])
+            ])],
+        )
+
+    def test_get_lecturer_timetable(self, auth_client):
+        client, _ = auth_client
+        first = self.create_period("01", "Basdat - A", "08.00")
+        # Replaced by the detail Period of the same major
+        self.create_period("02", "Basdat - X", "07.00", is_detail=False)
+        second = self.create_period("02", "Basdat - B", "09.00")
+
+        url = '{}/lecturers/budi santoso/timetable'.format(BASE_PATH)
+        res = client.get(url)
+        assert res.status_code == 200
+        data = res.get_json()
+        assert data['lecturer'] == 'Budi Santoso'
+        assert sorted(class_['class'] for class_ in data['classes']) == [
+            'Basdat - A', 'Basdat - B']
+        assert data['classes'][0]['schedule_items'][0]['room'] == '2.2304'
+        assert len(data['double_bookings']) == 1
+        booking = data['double_bookings'][0]
+        assert (booking['start'], booking['end']) == ('09.00', '09.40')
+        assert [class_['major_id'] for class_ in booking['classes']] == [
+            str(first.major_id.id), str(second.major_id.id)]
+
+        res = client.get('{}/lecturers/Ani/timetable'.format(BASE_PATH))
+        assert res.status_code == 404
@@ -1,4 +1,11 @@
+import datetime
+import gzip
+import json
+
+from bson import ObjectId
+
 from app import app
+from app.cache import courses_cache
 from models.user_schedule import UserSchedule
 from models.period import Class, Course, Period, ScheduleItem
 from .utils import BASE_PATH
@@ -38,6 +45,195 @@ class TestCourse:
         assert len(class_data['lecturer']) == 2
         assert len(class_data['schedule_items']) == 1
 
+    def test_get_courses_is_cached(self, auth_client):
+        client, user = auth_client
+        self.create_period(user.major.id)
+
+        url = '{}/majors/{}/courses'.format(BASE_PATH, user.major.id)
+        res = client.get(url)
+        assert res.headers['X-Cache'] == 'MISS'
+
+        res = client.get(url)
+        assert res.status_code == 200
+        assert res.headers['X-Cache'] == 'HIT'
+        assert len(res.get_json()['courses']) == 1
+
+    def test_get_courses_not_found(self, auth_client):
+        client, user = auth_client
+        courses_cache.clear()
+
+        url = '{}/majors/{}/courses'.format(BASE_PATH, user.major.id)
+        res = client.get(url)
+        assert res.status_code == 404
+
+    def test_get_courses_gzip(self, auth_client):
+        client, user = auth_client
+        self.create_period(user.major.id)
+
+        url = '{}/majors/{}/courses'.format(BASE_PATH, user.major.id)
+        res = client.get(url, headers={'Accept-Encoding': 'gzip'})
+
+        assert res.status_code == 200
+        assert res.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in res.headers['Vary']
+        res_json = json.loads(gzip.decompress(res.data))
+        assert res_json == client.get(url).get_json()
+
+    def test_get_courses_etag(self, auth_client):
+        client, user = auth_client
+        period = self.create_period(user.major.id)
+
+        url = '{}/majors/{}/courses'.format(BASE_PATH, user.major.id)
+        res = client.get(url)
+        etag = res.headers['ETag']
+        assert etag == 'W/"{}"'.format(period.version)
+
+        res = client.get(url, headers={'If-None-Match': etag})
+        assert res.status_code == 304
+        assert res.headers['ETag'] == etag
+        assert not res.data
+
+        period.courses[0].credit = 4
+        period.save()
+        res = client.get(url, headers={'If-None-Match': etag})
+        assert res.status_code == 200
+        assert res.headers['ETag'] != etag
+        assert res.headers['X-Cache'] == 'MISS'
+        assert res.get_json()['courses'][0]['credit'] == 4
+
+    def test_get_courses_saved_before_versions(self, auth_client):
+        client, user = auth_client
+        courses_cache.clear()
+        period_id = Period._get_collection().insert_one({
+            'major_id': user.major.id,
+            'name': app.config["ACTIVE_PERIOD"],
+            'is_detail': True,
+            'courses': [{**self.COURSE, 'classes': []}],
+        }).inserted_id
+
+        url = '{}/majors/{}/courses'.format(BASE_PATH, user.major.id)
+        res = client.get(url + '/summary')
+        assert res.status_code == 200
+        assert 'ETag' not in res.headers
+        res = client.get('{}/{}'.format(url, self.COURSE['name']))
+        assert res.status_code == 200
+        assert 'ETag' not in res.headers
+
+        # The first full read stores the payloads and version
+        res = client.get(url)
+        assert res.status_code == 200
+        assert res.get_json()['courses'][0]['name'] == self.COURSE['name']
+        period = Period.objects(id=period_id).first()
+        assert period.payload_gzip is not None
+        assert res.headers['ETag'] == 'W/"{}"'.format(period.version)
+
+        res = client.get(url, headers={'If-None-Match': res.headers['ETag']})
+        assert res.status_code == 304
+
+    def test_get_courses_delta(self, auth_client):
+        client, user = auth_client
+        period = self.create_period(user.major.id)
+
+        url = '{}/majors/{}/courses'.format(BASE_PATH, user.major.id)
+        res = client.get(url)
+        since = int(res.headers['X-Courses-Revision'])
+        assert since == period.revision
+
+        course = Course(name='Basis Data', credit=4, term=3, classes=[])
+        period.replace_courses(period.courses + [course])
+        period.save()
+
+        res = client.get(url, query_string={'since': since})
+        assert res.status_code == 200
+        res_json = res.get_json()
+        assert res_json['revision'] == period.revision
+        assert not res_json['full_reload']
+        assert res_json['added'] == [course.serialize()]
+        assert res_json['modified'] == []
+        assert res_json['removed'] == []
+
+        res = client.get(url, query_string={'since': since - 1})
+        assert res.get_json()['full_reload']
+
+        res = client.get(url, query_string={'since': 'latest'})
+        assert res.status_code == 400
+
+    def test_get_filtered_courses(self, auth_client):
+        client, user = auth_client
+        self.create_period(user.major.id)
+
+        url = '{}/majors/{}/courses'.format(BASE_PATH, user.major.id)
+        res = client.get(url, query_string={'day': 'Senin', 'term': 6})
+        assert res.status_code == 200
+        res_json = res.get_json()
+        assert res_json['next_cursor'] is None
+        assert [course['name'] for course in res_json['courses']] == [
+            self.COURSE['name']]
+
+        res = client.get(url, query_string={'lecturer': 'nobody'})
+        assert res.get_json()['courses'] == []
+
+        res = client.get(url, query_string={'start': 'pagi'})
+        assert res.status_code == 400
+        res = client.get(url, query_string={'cursor': -2, 'limit': 3})
+        assert res.status_code == 400
+
+    def test_get_course_summaries(self, auth_client):
+        client, user = auth_client
+        period = self.create_period(user.major.id)
+
+        url = '{}/majors/{}/courses/summary'.format(BASE_PATH, user.major.id)
+        res = client.get(url)
+        assert res.status_code == 200
+        res_json = res.get_json()
+        assert res_json['name'] == period.name
+        assert res_json['courses'] == [{**self.COURSE, 'class_count': 1}]
+
+        res = client.get(url, headers={'If-None-Match': res.headers['ETag']})
+        assert res.status_code == 304
+
+    def test_get_course_detail(self, auth_client):
+        client, user = auth_client
+        period = self.create_period(user.major.id)
+
+        url = '{}/majors/{}/courses/{}'.format(
+            BASE_PATH, user.major.id, self.COURSE['name'])
+        res = client.get(url)
+        assert res.status_code == 200
+        assert res.get_json()['course'] == period.courses[0].serialize()
+
+        url = '{}/majors/{}/courses/Unknown'.format(BASE_PATH, user.major.id)
+        res = client.get(url)
+        assert res.status_code == 404
+
+    def test_get_courses_batch(self, auth_client):
+        client, user = auth_client
+        self.create_period(user.major.id)
+        Period.objects().create(
+            major_id=user.major.id,
+            name=app.config["ACTIVE_PERIOD"],
+            is_detail=False,
+            courses=[],
+        )
+        other_major_id = '5fca7580cdbb000000000000'
+
+        url = '{}/majors/courses:batch'.format(BASE_PATH)
+        res = client.post(url, json={
+            'major_ids': [str(user.major.id), other_major_id]})
+        assert res.status_code == 200
+        res_json = res.get_json()
+        assert res_json[other_major_id] is None
+        major_courses = res_json[str(user.major.id)]
+        assert major_courses['is_detail']
+        assert major_courses == client.get('{}/majors/{}/courses'.format(
+            BASE_PATH, user.major.id)).get_json()
+
+        res = client.post(url, json={'major_ids': []})
+        assert res.get_json() == {}
+
+        res = client.post(url, json={'major_ids': ['bukan-id']})
+        assert res.status_code == 400
+
     def create_period(self, major_id):
         """Create dummy period with its course and class"""
 
@@ -151,6 +347,52 @@ class TestSchedule:
         assert res_json[0]['id'] == str(user_schedule.id)
         assert res_json[0]['schedule_items'] == self.schedule_items
 
+    def test_get_user_schedule_list_pages(self, auth_client):
+        client, user = auth_client
+        created_at = datetime.datetime(2020, 12, 2, 8, 30)
+        ids = []
+        for day in (1, 2, 2, 3):
+            user_schedule = self.create_user_schedule(user)
+            user_schedule.created_at = created_at + datetime.timedelta(days=day)
+            user_schedule.save()
+            ids.append(str(user_schedule.id))
+        # Newest first, ties broken by id
+        expected = [ids[3], ids[2], ids[1], ids[0]]
+
+        url = '{}/users/{}/user_schedules'.format(BASE_PATH, user.id)
+        res = client.get(url, query_string={'limit': 3})
+        assert res.status_code == 200
+        data = res.get_json()
+        assert [schedule['id'] for schedule in data['user_schedules']] == expected[:3]
+        assert data['user_schedules'][0]['schedule_items'] == self.schedule_items
+
+        res = client.get(url, query_string={'limit': 3, 'cursor': data['next_cursor']})
+        data = res.get_json()
+        assert [schedule['id'] for schedule in data['user_schedules']] == expected[3:]
+        assert data['next_cursor'] is None
+
+        res = client.get(url, query_string={'cursor': 'invalid'})
+        assert res.status_code == 400
+        res = client.get(url, query_string={
+            'cursor': '99999999999999999999999-{}'.format(ObjectId())})
+        assert res.status_code == 400
+
+    def test_get_user_schedule_list_summary(self, auth_client):
+        client, user = auth_client
+        user_schedule = self.create_user_schedule(user)
+
+        url = '{}/users/{}/user_schedules'.format(BASE_PATH, user.id)
+        res = client.get(url, query_string={'summary': 'true'})
+        assert res.status_code == 200
+        data = res.get_json()
+        assert data['next_cursor'] is None
+        assert len(data['user_schedules']) == 1
+        summary = data['user_schedules'][0]
+        assert sorted(summary) == ['created_at', 'id', 'item_count', 'name']
+        assert summary['id'] == str(user_schedule.id)
+        assert summary['created_at']
+        assert summary['item_count'] == len(self.schedule_items)
+
     def test_get_saved_user_schedule_detail(self, auth_client):
         client, user = auth_client
         user_schedule = self.create_user_schedule(user)
@@ -166,6 +408,161 @@ class TestSchedule:
         assert res_json['name'] is None
         assert res_json['schedule_items'] == self.schedule_items
 
+    def test_user_schedule_detail_cache(self, auth_client):
+        client, user = auth_client
+        user_schedule = self.create_user_schedule(user)
+        url = '{}/user_schedules/{}'.format(BASE_PATH, user_schedule.id)
+
+        res = client.get(url)
+        assert res.headers['X-Cache'] == 'MISS'
+        assert res.headers['Cache-Control'] == 'private, no-cache'
+        assert res.headers['Vary'] == 'Authorization'
+        res = client.get(url)
+        assert res.headers['X-Cache'] == 'HIT'
+        assert res.get_json()['user_schedule']['has_edit_access'] is True
+
+        # Anonymous visitors share the cached page, without edit access
+        with app.test_client() as anonymous:
+            res = anonymous.get(url)
+        assert res.headers['X-Cache'] == 'HIT'
+        assert res.headers['Cache-Control'].startswith('public')
+        assert res.get_json()['user_schedule']['has_edit_access'] is False
+
+        rename_url = '{}/users/{}/user_schedules/{}/change_name'.format(
+            BASE_PATH, user.id, user_schedule.id)
+        client.post(rename_url, json={'name': 'Renamed'})
+        res = client.get(url)
+        assert res.headers['X-Cache'] == 'MISS'
+        assert res.get_json()['user_schedule']['name'] == 'Renamed'
+
+        # Changes handled by another worker do not clear this cache
+        client.get(url)
+        UserSchedule.objects(id=user_schedule.id).update_one(set__name='Elsewhere')
+        res = client.get(url)
+        assert res.headers['X-Cache'] == 'MISS'
+        assert res.get_json()['user_schedule']['name'] == 'Elsewhere'
+        UserSchedule.objects(id=user_schedule.id).update_one(set__deleted=True)
+        assert client.get(url).status_code == 404
+
+        UserSchedule.objects(id=user_schedule.id).update_one(set__deleted=False)
+        client.delete('{}/users/{}/user_schedules/{}'.format(
+            BASE_PATH, user.id, user_schedule.id))
+        assert client.get(url).status_code == 404
+        assert client.get('{}/user_schedules/invalid'.format(BASE_PATH)).status_code == 404
+
+    def test_get_user_schedule_calendar(self, auth_client):
+        client, user = auth_client
+        user_schedule = self.create_user_schedule(user)
+
+        url = '{}/user_schedules/{}.ics'.format(BASE_PATH, user_schedule.id)
+        res = client.get(url)
+        assert res.status_code == 200
+        assert res.mimetype == 'text/calendar'
+        assert res.headers['X-Cache'] == 'MISS'
+        body = res.get_data(as_text=True)
+        assert body.startswith('BEGIN:VCALENDAR\r\n')
+        assert body.endswith('END:VCALENDAR\r\n')
+        assert body.count('BEGIN:VEVENT') == len(self.schedule_items)
+        assert 'RRULE:FREQ=WEEKLY;UNTIL=20190531T165959Z' in body
+
+        res = client.get(url)
+        assert res.headers['X-Cache'] == 'HIT'
+        assert res.get_data(as_text=True) == body
+
+        # A rename handled by another worker does not clear this cache
+        UserSchedule.objects(id=user_schedule.id).update_one(set__name='Renamed')
+        res = client.get(url)
+        assert res.headers['X-Cache'] == 'MISS'
+        assert 'X-WR-CALNAME:Renamed\r\n' in res.get_data(as_text=True)
+
+        update_url = '{}/users/{}/user_schedules/{}'.format(
+            BASE_PATH, user.id, user_schedule.id)
+        client.put(update_url, json={'schedule_items': self.schedule_items[:1]})
+        res = client.get(url)
+        assert res.headers['X-Cache'] == 'MISS'
+        assert res.get_data(as_text=True).count('BEGIN:VEVENT') == 1
+
+        client.delete(update_url)
+        assert client.get(url).status_code == 404
+
+    def test_batch_user_schedules(self, auth_client):
+        client, user = auth_client
+        renamed = self.create_user_schedule(user)
+        deleted = self.create_user_schedule(user)
+
+        url = '{}/users/{}/user_schedules:batch'.format(BASE_PATH, user.id)
+        res = client.post(url, json={'operations': [
+            {'op': 'create', 'name': '<i>Imported</i>', 'schedule_items': self.schedule_items},
+            {'op': 'rename', 'id': str(renamed.id), 'name': '<b>Renamed</b>'},
+            {'op': 'delete', 'id': str(deleted.id)},
+            {'op': 'rename', 'id': str(deleted.id), 'name': 'Too late'},
+            {'op': 'create', 'schedule_items': [{'unknown': 'field'}]},
+            {'op': 'move'},
+            {'op': 'rename', 'id': [str(renamed.id)], 'name': 'List'},
+            {'op': 'delete', 'id': {'id': str(renamed.id)}},
+        ]})
+        assert res.status_code == 200
+        results = res.get_json()['results']
+        assert [(result['op'], result['status']) for result in results] == [
+            ('create', 201), ('rename', 200), ('delete', 204),
+            ('rename', 404), ('create', 400), ('move', 400),
+            ('rename', 400), ('delete', 400)]
+
+        created = UserSchedule.objects(id=results[0]['id']).first()
+        assert created.name == '&lt;i&gt;Imported&lt;/i&gt;'
+        assert created.user_id == user
+        assert [item.serialize() for item in created.schedule_items] == self.schedule_items
+        assert created.schedule_items[0].start_minutes == 8 * 60
+
+        renamed.reload()
+        assert renamed.name == '&lt;b&gt;Renamed&lt;/b&gt;'
+        deleted.reload()
+        assert deleted.deleted
+        assert deleted.name is None
+
+        res = client.post(url, json={'operations': [{'op': 'delete'}] * 101})
+        assert res.status_code == 400
+
+    def test_update_user_schedule(self, auth_client):
+        client, user = auth_client
+        user_schedule = self.create_user_schedule(user)
+        original_items = self.schedule_items
+
+        url = '{}/users/{}/user_schedules/{}'.format(BASE_PATH, user.id, user_schedule.id)
+        states = [original_items]
+        for version in range(1, 13):
+            items = original_items + [{
+                'name': 'Kelas {}'.format(version),
+                'day': 'Jumat',
+                'room': None,
+                'start': '13.00',
+                'end': '14.40',
+            }]
+            res = client.put(url, json={'version': version - 1, 'schedule_items': items})
+            assert res.status_code == 200
+            assert res.get_json()['version'] == version
+            states.append(items)
+
+        user_schedule.reload()
+        assert user_schedule.version == 12
+        assert [item.serialize() for item in user_schedule.schedule_items] == states[-1]
+
+        res = client.put(url, json={'version': 3, 'schedule_items': []})
+        assert res.status_code == 409
+        assert res.get_json()['version'] == 12
+        res = client.put(url, json={'schedule_items': [{'unknown': 'field'}]})
+        assert res.status_code == 400
+
+        versions = client.get(url + '/versions').get_json()['versions']
+        assert [version['version'] for version in versions] == list(range(12, -1, -1))
+        assert [version['version'] for version in versions if version['snapshot']] == [10, 0]
+
+        for version in (0, 5, 10, 11, 12):
+            res = client.get('{}/versions/{}'.format(url, version))
+            assert res.status_code == 200
+            assert res.get_json()['schedule_items'] == states[version]
+        assert client.get(url + '/versions/13').status_code == 404
+
     def test_rename_user_schedule(self, auth_client):
         client, user = auth_client
         user_schedule = self.create_user_schedule(user)
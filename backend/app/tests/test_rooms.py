@@ -0,0 +1,133 @@
+from app import app
+from app.rooms import RoomIndex, active_period_rooms
+from models.major import Major
+from models.period import Class, Course, Period, ScheduleItem
+from .utils import BASE_PATH
+
+
+def make_course(name, *classes):
+    return {
+        "name": name,
+        "classes": [
+            {
+                "name": class_name,
+                "schedule_items": [
+                    {"day": day, "start": start, "end": end, "room": room}
+                    for day, start, end, room in items
+                ],
+            }
+            for class_name, items in classes
+        ],
+    }
+
+
+COURSES = [
+    make_course(
+        "Basis Data",
+        ("Basdat - A", [("Selasa", "13.00", "14.40", "2.2304"),
+                        ("Kamis", "13.00", "14.40", "2.2304")]),
+        ("Basdat - B", [("Selasa", "08.00", "09.40", "3.3111")]),
+    ),
+    make_course(
+        "Analisis Numerik",
+        ("Anum - A", [("Selasa", "10.00", "12.30", "3.3111"),
+                      ("Rabu", "10.00", "11.40", "-")]),
+    ),
+]
+
+
+def occupied_classes(occupied):
+    return {
+        room: [occupant["class"] for _, _, occupant in entries]
+        for room, entries in occupied.items()
+    }
+
+
+class TestRoomIndex:
+    """Test per room and day timelines"""
+
+    def test_free_and_occupied_rooms(self):
+        index = RoomIndex()
+        index.update_period("period-1", "major-1", "v1", COURSES)
+
+        # Tuesday 12.00-13.30 overlaps Anum - A and Basdat - A
+        assert index.find_free(1, 12 * 60, 13 * 60 + 30) == []
+        assert occupied_classes(index.find_occupied(1, 12 * 60, 13 * 60 + 30)) == {
+            "2.2304": ["Basdat - A"], "3.3111": ["Anum - A"]}
+
+        # Classes ending or starting at the window edge do not clash
+        assert index.find_free(1, 9 * 60 + 40, 10 * 60) == ["2.2304", "3.3111"]
+        assert index.find_free(2, 7 * 60, 18 * 60) == ["2.2304", "3.3111"]
+
+    def test_update_and_remove_period(self):
+        index = RoomIndex()
+        index.update_period("period-1", "major-1", "v1", COURSES)
+        index.update_period("period-2", "major-2", "v1", [make_course(
+            "Kalkulus", ("Kalkulus - A", [("Jumat", "08.00", "09.40", "A6.09")]))])
+        assert index.find_free(4, 8 * 60, 9 * 60) == ["2.2304", "3.3111"]
+
+        index.update_period("period-1", "major-1", "v2", COURSES[1:])
+        assert index.find_free(1, 13 * 60, 14 * 60) == ["3.3111", "A6.09"]
+
+        index.remove_period("period-1")
+        index.remove_period("period-2")
+        assert index.rooms == {}
+        assert index.timelines == {}
+        assert index.entries == {}
+
+
+class TestRoomsEndpoint:
+    """Test free and occupied room lookup across every major"""
+
+    def test_find_rooms(self, auth_client):
+        client, _ = auth_client
+        major = Major.objects().create(name="Ilmu Komputer", kd_org="01")
+        Period.objects().create(
+            major_id=major,
+            name=app.config["ACTIVE_PERIOD"],
+            is_detail=True,
+            courses=[Course(name="Basis Data", classes=[
+                Class(name="Basdat - A", schedule_items=[ScheduleItem(
+                    day="Selasa", start="13.00", end="14.40", room="2.2304")])])],
+        )
+        period = Period.objects().create(
+            major_id=Major.objects().create(name="Sistem Informasi", kd_org="02"),
+            name=app.config["ACTIVE_PERIOD"],
+            is_detail=True,
+            courses=[Course(name="Kalkulus", classes=[
+                Class(name="Kalkulus - A", schedule_items=[ScheduleItem(
+                    day="Selasa", start="08.00", end="09.40", room="3.3111")])])],
+        )
+        active_period_rooms.mark_stale()
+
+        url = '{}/rooms'.format(BASE_PATH)
+        window = {'day': 'Selasa', 'start': '13.00', 'end': '14.40'}
+        res = client.get(url, query_string=window)
+        assert res.status_code == 200
+        assert res.get_json()['rooms'] == [{'room': '3.3111'}]
+
+        res = client.get(url, query_string={**window, 'status': 'occupied'})
+        assert res.get_json()['rooms'] == [{
+            'room': '2.2304',
+            'classes': [{
+                'major_id': str(major.id),
+                'course': 'Basis Data',
+                'class': 'Basdat - A',
+                'start': '13.00',
+                'end': '14.40',
+            }],
+        }]
+
+        period.replace_courses([Course(name="Kalkulus", classes=[
+            Class(name="Kalkulus - A", schedule_items=[ScheduleItem(
+                day="Selasa", start="13.00", end="14.40", room="3.3111")])])])
+        period.save()
+        active_period_rooms.mark_stale()
+
+        res = client.get(url, query_string=window)
+        assert res.get_json()['rooms'] == []
+
+        res = client.get(url, query_string={**window, 'end': '12.00'})
+        assert res.status_code == 400
+        res = client.get(url, query_string={**window, 'status': 'busy'})
+        assert res.status_code == 400
@@ -0,0 +1,91 @@
+from app import app
+from app.search import SearchIndex, active_period_search
+from models.major import Major
+from models.period import Class, Course, Period
+from .utils import BASE_PATH
+
+COURSES = [
+    {
+        "name": "Basis Data",
+        "classes": [
+            {"name": "Basdat - A", "lecturer": ["Budi Santoso"]},
+            {"name": "Basdat - B", "lecturer": ["Ani Wijaya"]},
+        ],
+    },
+    {
+        "name": "Analisis Numerik",
+        "classes": [
+            {"name": "Anum - A", "lecturer": ["Budi Hartono"]},
+        ],
+    },
+]
+
+
+def class_names(results):
+    return [result["class"] for result in results]
+
+
+class TestSearchIndex:
+    """Test inverted index over courses, classes and lecturers"""
+
+    def test_search_by_token_and_prefix(self):
+        index = SearchIndex()
+        index.update_period("period-1", "major-1", "v1", COURSES)
+
+        assert class_names(index.search("basis data")) == [
+            "Basdat - A", "Basdat - B"]
+        assert class_names(index.search("Bud")) == ["Basdat - A", "Anum - A"]
+        assert class_names(index.search("budi basis")) == ["Basdat - A"]
+        assert class_names(index.search("anum")) == ["Anum - A"]
+        assert index.search("kalkulus") == []
+        assert index.search("") == []
+        assert len(index.search("budi", limit=1)) == 1
+
+    def test_update_and_remove_period(self):
+        index = SearchIndex()
+        index.update_period("period-1", "major-1", "v1", COURSES)
+        index.update_period("period-2", "major-2", "v1", COURSES[1:])
+        assert len(index.search("numerik")) == 2
+
+        index.update_period("period-2", "major-2", "v2", [])
+        assert len(index.search("numerik")) == 1
+
+        index.remove_period("period-1")
+        assert index.search("numerik") == []
+        assert index.documents == {}
+        assert index.vocabulary == []
+
+
+class TestSearchEndpoint:
+    """Test course search across every major of the active period"""
+
+    def create_period(self, kd_org, class_name, lecturer, is_detail=True):
+        return Period.objects().create(
+            major_id=Major.objects().create(name=kd_org, kd_org=kd_org),
+            name=app.config["ACTIVE_PERIOD"],
+            is_detail=is_detail,
+            courses=[Course(name="Basis Data", classes=[
+                Class(name=class_name, lecturer=[lecturer])])],
+        )
+
+    def test_search(self, auth_client):
+        client, _ = auth_client
+        self.create_period("01", "Basdat - A", "Budi Santoso")
+        period = self.create_period("02", "Basdat - B", "Ani Wijaya")
+        active_period_search.mark_stale()
+
+        url = '{}/search'.format(BASE_PATH)
+        res = client.get(url, query_string={'q': 'basis'})
+        assert res.status_code == 200
+        assert sorted(class_names(res.get_json()['results'])) == [
+            "Basdat - A", "Basdat - B"]
+
+        period.replace_courses([Course(name="Basis Data", classes=[
+            Class(name="Basdat - C", lecturer=["Ani Wijaya"])])])
+        period.save()
+        active_period_search.mark_stale()
+
+        res = client.get(url, query_string={'q': 'ani'})
+        results = res.get_json()['results']
+        assert class_names(results) == ["Basdat - C"]
+        assert results[0]['major_id'] == str(period.major_id.id)
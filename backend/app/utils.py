@@ -1,10 +1,12 @@
 import datetime
-from flask import current_app as app
+from flask import current_app as app, g, request
 
+from app.cache import invalidate_courses
 from app.jwt_utils import decode_token, encode_token
 
 from models.major import Major
 from models.period import Period
+from models.scrape_job import DONE, ScrapeJob
 from models.user import User
 from scraper.main import scrape_courses
 
@@ -26,8 +28,14 @@ def extract_header_data(header):
 
     return data
 
+def get_token_data():
+    """Return the token claims of the current request, decoded once."""
+    if "token_data" not in g:
+        g.token_data = extract_header_data(request.headers)
+    return g.token_data
+
 def get_user_id(request):
-    data = extract_header_data(request.headers)
+    data = get_token_data()
     if data is not None and 'user_id' in data:
         return data['user_id']
     return None
@@ -44,33 +52,21 @@ def process_sso_profile(sso_profile):
         major = Major(name=major_name, kd_org=major_kd_org)
         major.save()
 
-    period_detail = Period.objects(
-        major_id=major.id, name=period_name, is_detail=True).first()
-    period_not_detail = Period.objects(
-        major_id=major.id, name=period_name, is_detail=False).first()
-
-    if period_detail is None:
-        if period_not_detail is None:
-            courses, is_detail = scrape_courses(major_kd_org, period_name)
-
-            if not courses:
-                result = {
-                    "err": True,
-                    "major_name": major_name
-                }
-                return result
-        else:
-            courses, is_detail = scrape_courses(
-                major_kd_org, period_name, skip_not_detail=True)
-
-        if courses:
-            period = Period(
-                major_id=major.id,
-                name=period_name,
-                courses=courses,
-                is_detail=is_detail
-            )
-            period.save()
+    # Scraping takes several seconds, a `flask cron scrape_worker` does it
+    # while the frontend polls `GET /majors/<major_id>/period_status`
+    period = Period.get_active(major.id, period_name)
+    job = None
+    if (period is None) or (not period.is_detail):
+        job = ScrapeJob.enqueue(
+            major, period_name, retry_interval=app.config["SCRAPE_JOB_RETRY_INTERVAL"])
+
+    if (period is None) and (job.status == DONE):
+        # The last scrape found no courses, the major is not supported
+        result = {
+            "err": True,
+            "major_name": major_name
+        }
+        return result
 
     user = User.objects(npm=user_npm).first()
     if user is None:
@@ -87,7 +83,29 @@ def process_sso_profile(sso_profile):
     result = {
         "user_id": str(user.id),
         "major_id": str(user.major.id),
-        "token": token
+        "token": token,
+        "major_name": major_name,
+        "period_ready": period is not None,
+        "scrape_job": job.serialize() if job is not None else None,
     }
 
     return result
+
+
+def run_scrape_job(job):
+    """Scrape the courses of a claimed ScrapeJob into a new Period."""
+    period = Period.get_active(job.major_id.id, job.period_name)
+    if (period is not None) and period.is_detail:
+        return
+
+    courses, is_detail = scrape_courses(
+        job.kd_org, job.period_name, skip_not_detail=period is not None)
+    if courses:
+        period = Period(
+            major_id=job.major_id.id,
+            name=job.period_name,
+            courses=courses,
+            is_detail=is_detail
+        )
+        period.save()
+        invalidate_courses(job.major_id.id, job.period_name)
@@ -0,0 +1,130 @@
+from flask import (
+    Blueprint,
+    current_app as app,
+    jsonify,
+    request
+)
+
+from app.conflicts import find_double_bookings
+from app.decorators import require_jwt_token
+from app.rooms import active_period_rooms
+from app.search import active_period_search
+from models.lecturer_schedule import LecturerSchedule, get_lecturer_key
+from models.period import (
+    DAYS,
+    Period,
+    ScheduleItem,
+    format_minutes,
+    get_day_index,
+    get_minutes
+)
+
+
+router_catalog = Blueprint('router_catalog', __name__)
+
+MAX_SEARCH_RESULTS = 100
+
+
+@router_catalog.route('/search', methods=['GET'])
+@require_jwt_token
+def search_courses():
+    query = request.args.get("q", "")
+    limit = request.args.get("limit", 20, type=int)
+    limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+
+    results = active_period_search.search(
+        app.config["ACTIVE_PERIOD"], query, limit=limit)
+    return (jsonify({
+        "results": results
+    }), 200)
+
+
+@router_catalog.route('/rooms', methods=['GET'])
+@require_jwt_token
+def find_rooms():
+    day = get_day_index(request.args.get("day"))
+    start = get_minutes(request.args.get("start"))
+    end = get_minutes(request.args.get("end"))
+    status = request.args.get("status", "free")
+    if None in (day, start, end) or end <= start:
+        return (jsonify({
+            'message': 'day, start and end must be a valid day and time window'
+        }), 400)
+    if status not in ("free", "occupied"):
+        return (jsonify({
+            'message': 'status must be free or occupied'
+        }), 400)
+
+    rooms = active_period_rooms.get_index(app.config["ACTIVE_PERIOD"])
+    if status == "free":
+        results = [{"room": room} for room in rooms.find_free(day, start, end)]
+    else:
+        results = [
+            {
+                "room": room,
+                "classes": [
+                    {
+                        **occupant,
+                        "start": format_minutes(class_start),
+                        "end": format_minutes(class_end),
+                    }
+                    for class_start, class_end, occupant in entries
+                ],
+            }
+            for room, entries in sorted(rooms.find_occupied(day, start, end).items())
+        ]
+    return (jsonify({
+        "day": DAYS[day],
+        "start": format_minutes(start),
+        "end": format_minutes(end),
+        "status": status,
+        "rooms": results,
+    }), 200)
+
+
+@router_catalog.route('/lecturers/<name>/timetable', methods=['GET'])
+@require_jwt_token
+def get_lecturer_timetable(name):
+    period_name = app.config["ACTIVE_PERIOD"]
+    schedules = list(LecturerSchedule.objects(
+        period_name=period_name,
+        lecturer_key=get_lecturer_key(name)
+    ).as_pymongo())
+
+    # A general Period only counts for majors without a detail Period
+    general = [data["major_id"] for data in schedules if not data.get("is_detail")]
+    if general:
+        detailed = {
+            data["major_id"] for data in Period.objects(
+                major_id__in=general, name=period_name, is_detail=True
+            ).only("major_id").as_pymongo()
+        }
+        schedules = [
+            data for data in schedules
+            if data.get("is_detail") or data["major_id"] not in detailed
+        ]
+
+    if not schedules:
+        return (jsonify({
+            'message': 'There is no class of this lecturer on the active period'
+        }), 404)
+
+    classes = [
+        {"major_id": str(data["major_id"]), **class_}
+        for data in schedules
+        for class_ in data.get("classes", [])
+    ]
+    return (jsonify({
+        "lecturer": schedules[0]["lecturer"],
+        "classes": [
+            {
+                **class_,
+                "schedule_items": [
+                    ScheduleItem.serialize_raw(item)
+                    for item in class_["schedule_items"]
+                ],
+            }
+            for class_ in classes
+        ],
+        "double_bookings": find_double_bookings(classes),
+    }), 200)
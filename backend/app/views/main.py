@@ -1,14 +1,30 @@
 import html
+from datetime import date, datetime, timedelta
+from bson import ObjectId
 from flask import (
     Blueprint,
     current_app as app,
     jsonify,
     request
 )
+from mongoengine import FieldDoesNotExist, Q, ValidationError
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
 
+from app.cache import (
+    calendar_cache,
+    courses_cache,
+    invalidate_user_schedule,
+    user_schedule_cache
+)
+from app.course_index import get_course_index
 from app.decorators import require_jwt_token, require_same_user_id
-from models.period import Period
-from models.user_schedule import UserSchedule
+from app.ical import generate_calendar
+from models.period import Period, get_day_index, get_minutes
+from models.period_change import PeriodChange
+from models.scrape_job import ScrapeJob
+from models.user_schedule import ScheduleItem, ScheduleItemSet, UserSchedule
+from models.user_schedule_version import UserScheduleVersion
 from app.utils import get_user_id
 
 
@@ -19,19 +35,246 @@ router_main = Blueprint('router_sunjad', __name__)
 @require_jwt_token
 def get_courses(major_id):
     active_period = get_app_config("ACTIVE_PERIOD")
-    period = Period.objects(
-        major_id=major_id,
-        name=active_period,
-        is_detail=True
-    ).first()
+    period = Period.get_active(major_id, active_period)
+
+    if period is None:
+        return (jsonify({
+            'message': 'There is no course for this major on the active period'
+        }), 404)
+
+    since = request.args.get("since")
+    if since is not None:
+        return get_courses_delta(period, since)
+
+    if any(param in request.args for param in COURSE_FILTER_PARAMS):
+        return get_filtered_courses(period)
+
+    if is_not_modified(period):
+        return make_not_modified_response(period)
+
+    cache_key = (major_id, active_period)
+    cached = courses_cache.get(cache_key)
+    if cached is not None and cached[0] == period.version:
+        cache_status = "HIT"
+        payloads = cached[1]
+    else:
+        cache_status = "MISS"
+        period = Period.objects(id=period.id).exclude("courses").first()
+        payloads = period.get_payloads()
+        courses_cache.set(cache_key, (period.version, payloads))
 
+    encoding = request.accept_encodings.best_match(
+        [encoding for encoding in ("br", "gzip") if encoding in payloads])
+    response = make_json_response(
+        payloads[encoding or "identity"], cache_status=cache_status)
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    set_period_etag(response, period)
+    response.headers["X-Courses-Revision"] = period.revision
+    return response
+
+
+@router_main.route('/majors/<major_id>/courses/summary', methods=['GET'])
+@require_jwt_token
+def get_course_summaries(major_id):
+    period = Period.get_active(major_id, get_app_config("ACTIVE_PERIOD"))
     if period is None:
-        period = Period.objects(
-            major_id=major_id,
-            name=active_period,
-            is_detail=False
-        ).first()
-    return (jsonify(period.serialize()), 200)
+        return (jsonify({
+            'message': 'There is no course for this major on the active period'
+        }), 404)
+
+    if is_not_modified(period):
+        return make_not_modified_response(period)
+
+    index = get_course_index(period)
+    response = jsonify({
+        "name": index.name,
+        "is_detail": index.is_detail,
+        "courses": index.summaries,
+    })
+    set_period_etag(response, period)
+    response.headers["X-Courses-Revision"] = period.revision
+    return response
+
+
+@router_main.route('/majors/<major_id>/courses/<path:course_name>', methods=['GET'])
+@require_jwt_token
+def get_course_detail(major_id, course_name):
+    period = Period.get_active(major_id, get_app_config("ACTIVE_PERIOD"))
+    course = None
+    if period is not None:
+        if is_not_modified(period):
+            return make_not_modified_response(period)
+        course = get_course_index(period).get_course(course_name)
+
+    if course is None:
+        return (jsonify({
+            'message': 'There is no such course for this major on the active period'
+        }), 404)
+
+    response = jsonify({"course": course})
+    set_period_etag(response, period)
+    return response
+
+
+@router_main.route('/majors/<major_id>/period_status', methods=['GET'])
+@require_jwt_token
+def get_period_status(major_id):
+    if not ObjectId.is_valid(major_id):
+        return (jsonify({
+            'message': 'Major not found'
+        }), 404)
+
+    period_name = get_app_config("ACTIVE_PERIOD")
+    period = Period.objects(
+        major_id=major_id, name=period_name
+    ).order_by("-is_detail").only("is_detail").first()
+    job = ScrapeJob.objects(major_id=major_id, period_name=period_name).first()
+    return (jsonify({
+        'ready': period is not None,
+        'is_detail': period.is_detail if period is not None else None,
+        'job': job.serialize() if job is not None else None,
+    }), 200)
+
+
+MAX_BATCH_MAJORS = 50
+
+
+@router_main.route('/majors/courses:batch', methods=['POST'])
+@require_jwt_token
+def get_courses_batch():
+    major_ids = (request.json or {}).get("major_ids")
+    if (not isinstance(major_ids, list) or len(major_ids) > MAX_BATCH_MAJORS
+            or not all(ObjectId.is_valid(major_id) for major_id in major_ids)):
+        return (jsonify({
+            'message': f'major_ids must be a list of at most {MAX_BATCH_MAJORS} major ids'
+        }), 400)
+
+    active_period = get_app_config("ACTIVE_PERIOD")
+    major_ids = list(dict.fromkeys(major_ids))
+    periods = Period.objects(
+        major_id__in=major_ids,
+        name=active_period
+    ).order_by("major_id", "-is_detail").exclude(
+        "courses", "payload_br").no_dereference()
+
+    def generate():
+        missing = set(major_ids)
+        separator = "{"
+        for period in periods:
+            major_id = str(period.major_id.id)
+            if major_id not in missing:
+                continue  # the detail period of this major was already sent
+            missing.discard(major_id)
+
+            cached = courses_cache.get((major_id, active_period))
+            if cached is not None and cached[0] == period.version:
+                body = cached[1]["identity"]
+            else:
+                body = period.get_payloads()["identity"]
+            yield f'{separator}"{major_id}":'.encode() + body
+            separator = ","
+
+        for major_id in major_ids:
+            if major_id in missing:
+                yield f'{separator}"{major_id}":null'.encode()
+                separator = ","
+        yield b"{}" if separator == "{" else b"}"
+
+    return make_json_response(generate())
+
+
+def is_not_modified(period):
+    return (period.version is not None) and (
+        request.if_none_match.contains_weak(period.version))
+
+
+def set_period_etag(response, period):
+    # Periods stored before versioning have none until re-saved, see
+    # `flask cron backfill_period_versions`
+    if period.version is not None:
+        response.set_etag(period.version, weak=True)
+
+
+def make_not_modified_response(period):
+    response = app.response_class(status=304)
+    response.set_etag(period.version, weak=True)
+    response.headers["X-Courses-Revision"] = period.revision
+    return response
+
+
+COURSE_FILTER_PARAMS = (
+    "term", "credit", "day", "start", "end", "lecturer", "name", "cursor", "limit")
+MAX_COURSES_PAGE_SIZE = 200
+
+
+def get_filtered_courses(period):
+    args = request.args
+    try:
+        filters = {
+            "term": parse_arg(args, "term", int),
+            "credit": parse_arg(args, "credit", int),
+            "day": parse_arg(args, "day", get_day_index),
+            "start": parse_arg(args, "start", get_minutes),
+            "end": parse_arg(args, "end", get_minutes),
+            "lecturer": args.get("lecturer"),
+            "name": args.get("name"),
+        }
+        cursor = parse_arg(args, "cursor", parse_course_cursor) or 0
+        limit = parse_arg(args, "limit", int) or 50
+    except ValueError as e:
+        return (jsonify({'message': str(e)}), 400)
+
+    limit = max(1, min(limit, MAX_COURSES_PAGE_SIZE))
+    index = get_course_index(period)
+    courses, next_cursor = index.get_page(
+        index.search(**filters), cursor=cursor, limit=limit)
+    return (jsonify({
+        "name": index.name,
+        "is_detail": index.is_detail,
+        "courses": courses,
+        "next_cursor": next_cursor,
+    }), 200)
+
+
+def parse_course_cursor(value):
+    cursor = int(value)
+    return cursor if cursor >= 0 else None
+
+
+def parse_arg(args, name, parse):
+    value = args.get(name)
+    if value is None:
+        return None
+
+    try:
+        parsed = parse(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError(f"Invalid value for {name}: {value}")
+    return parsed
+
+
+def get_courses_delta(period, since):
+    try:
+        since = int(since)
+    except ValueError:
+        return (jsonify({
+            'message': 'since must be a course revision number'
+        }), 400)
+
+    delta = PeriodChange.get_delta(period.id, since, period.revision)
+    data = {
+        "name": period.name,
+        "is_detail": period.is_detail,
+        "revision": period.revision,
+        "full_reload": delta is None,
+    }
+    if delta is not None:
+        data.update(delta)
+    return (jsonify(data), 200)
 
 
 @router_main.route('/users/<user_id>/user_schedule', methods=['POST'])
@@ -51,29 +294,176 @@ def save_user_schedule(user_id):
 
 @router_main.route('/user_schedules/<user_schedule_id>')
 def get_user_schedule_detail(user_schedule_id):
-    user_schedule = UserSchedule.objects(id=user_schedule_id).first()
+    current = None
+    if ObjectId.is_valid(user_schedule_id):
+        current = UserSchedule.objects(
+            id=user_schedule_id, deleted=False
+        ).only("version", "name").as_pymongo().first()
+    if current is None:
+        return (jsonify({
+            'message': 'User schedule not found'
+        }), 404)
+
+    # Changes made through another worker do not clear this cache, so
+    # entries are keyed by what every change updates
+    key = (user_schedule_id, current.get("version", 0), current.get("name"))
+    cached = user_schedule_cache.get(key)
+    cache_status = "HIT"
+    if cached is None:
+        cache_status = "MISS"
+        # The owner is only compared by id, never loaded
+        user_schedule = UserSchedule.objects(
+            id=user_schedule_id, deleted=False).no_dereference().first()
+        if user_schedule is None:
+            return (jsonify({
+                'message': 'User schedule not found'
+            }), 404)
+        cached = (str(user_schedule.user_id.id), user_schedule.serialize())
+        user_schedule_cache.set(
+            (user_schedule_id, user_schedule.version, user_schedule.name), cached)
+
+    owner_id, data = cached
     request_user_id = get_user_id(request)
-    return (jsonify({
+    response = jsonify({
         'user_schedule': {
-            **user_schedule.serialize(),
-            "has_edit_access": str(user_schedule.user_id.id) == request_user_id
+            **data,
+            "has_edit_access": owner_id == request_user_id
         }
-    }), 200)
+    })
+    # `has_edit_access` depends on the token, only anonymous hits are shared.
+    # Signed in users may have just changed the schedule, so never reuse theirs
+    if request_user_id is None:
+        response.headers["Cache-Control"] = "public, max-age={}".format(
+            app.config["USER_SCHEDULE_MAX_AGE"])
+    else:
+        response.headers["Cache-Control"] = "private, no-cache"
+    response.headers["Vary"] = "Authorization"
+    response.headers["X-Cache"] = cache_status
+    return (response, 200)
+
+
+@router_main.route('/user_schedules/<user_schedule_id>.ics')
+def get_user_schedule_calendar(user_schedule_id):
+    current = None
+    if ObjectId.is_valid(user_schedule_id):
+        current = UserSchedule.objects(
+            id=user_schedule_id, deleted=False
+        ).only("version", "name").as_pymongo().first()
+    if current is None:
+        return (jsonify({
+            'message': 'User schedule not found'
+        }), 404)
+
+    # Renames keep the version, and only clear the cache of the worker
+    # handling them, so the name is part of the key
+    key = (user_schedule_id, current.get("version", 0), current.get("name"))
+    body = calendar_cache.get(key)
+    cache_status = "HIT"
+    if body is None:
+        cache_status = "MISS"
+        user_schedule = UserSchedule.objects(
+            id=user_schedule_id, deleted=False).no_dereference().first()
+        if user_schedule is None:
+            return (jsonify({
+                'message': 'User schedule not found'
+            }), 404)
+        body = generate_cached_calendar(
+            (user_schedule_id, user_schedule.version, user_schedule.name),
+            generate_calendar(
+                user_schedule_id,
+                user_schedule.name,
+                [item.serialize() for item in user_schedule.schedule_items],
+                date.fromisoformat(get_app_config("ACTIVE_PERIOD_START")),
+                date.fromisoformat(get_app_config("ACTIVE_PERIOD_END"))
+            )
+        )
+
+    response = app.response_class(body, mimetype="text/calendar")
+    response.headers["Content-Disposition"] = f'inline; filename="{user_schedule_id}.ics"'
+    response.headers["Cache-Control"] = "public, max-age={}".format(
+        get_app_config("USER_SCHEDULE_MAX_AGE"))
+    response.headers["X-Cache"] = cache_status
+    return response
+
+
+def generate_cached_calendar(key, chunks):
+    """Stream `chunks`, caching them once the whole calendar was sent."""
+    sent = []
+    for chunk in chunks:
+        sent.append(chunk)
+        yield chunk
+    calendar_cache.set(key, sent)
 
 
 @router_main.route('/users/<user_id>/user_schedules')
 @require_jwt_token
 @require_same_user_id
 def get_user_schedule_list(user_id):
-    schedules = UserSchedule.objects(user_id=user_id, deleted=False).all()
-    data = []
-    for schedule in schedules:
-        data.append(schedule.serialize())
+    args = request.args
+    try:
+        limit = parse_arg(args, "limit", int)
+        cursor = parse_arg(args, "cursor", parse_schedule_cursor)
+    except ValueError as e:
+        return (jsonify({'message': str(e)}), 400)
+    summary = args.get("summary", "").lower() in ("1", "true")
+
+    schedules = UserSchedule.objects(user_id=user_id, deleted=False)
+    if cursor is not None:
+        created_at, last_id = cursor
+        schedules = schedules.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=last_id))
+    schedules = schedules.order_by("-created_at", "-id")
+    if limit is not None:
+        limit = max(1, min(limit, MAX_USER_SCHEDULES_PAGE_SIZE))
+        schedules = schedules.limit(limit + 1)
+
+    if summary:
+        data = [
+            UserSchedule.serialize_summary_raw(schedule)
+            for schedule in schedules.aggregate([
+                {"$project": UserSchedule.SUMMARY_PROJECTION}])
+        ]
+    else:
+        data = [
+            schedule.serialize()
+            for schedule in UserSchedule.from_sons(schedules.as_pymongo())
+        ]
+
+    next_cursor = None
+    if limit is not None and len(data) > limit:
+        data = data[:limit]
+        next_cursor = make_schedule_cursor(data[-1]["created_at"], data[-1]["id"])
     return (jsonify({
-        'user_schedules': data
+        'user_schedules': data,
+        'next_cursor': next_cursor,
     }), 200)
 
 
+MAX_USER_SCHEDULES_PAGE_SIZE = 100
+EPOCH = datetime(1970, 1, 1)
+
+
+def make_schedule_cursor(created_at, user_schedule_id):
+    """Return "<created_at in ms>-<id>" of the last schedule of a page.
+
+    MongoDB stores datetimes in milliseconds, so the cursor matches the
+    stored value exactly.
+    """
+    milliseconds = (created_at - EPOCH) // timedelta(milliseconds=1)
+    return f"{milliseconds}-{user_schedule_id}"
+
+
+def parse_schedule_cursor(value):
+    milliseconds, user_schedule_id = value.split("-")
+    if not ObjectId.is_valid(user_schedule_id):
+        return None
+    try:
+        created_at = EPOCH + timedelta(milliseconds=int(milliseconds))
+    except OverflowError:
+        return None
+    return (created_at, ObjectId(user_schedule_id))
+
+
 @router_main.route('/users/<user_id>/user_schedules/<user_schedule_id>', methods=['DELETE'])
 @require_jwt_token
 @require_same_user_id
@@ -81,6 +471,7 @@ def delete_user_schedule(user_id, user_schedule_id):
     user_schedule = UserSchedule.objects(id=user_schedule_id).first()
     user_schedule.deleted = True
     user_schedule.save()
+    invalidate_user_schedule(user_schedule_id)
     return (jsonify(), 204)
 
 
@@ -92,10 +483,237 @@ def rename_user_schedule(user_id, user_schedule_id):
     user_schedule = UserSchedule.objects(id=user_schedule_id).first()
     user_schedule.name = html.escape(data["name"])
     user_schedule.save()
+    invalidate_user_schedule(user_schedule_id)
     return (jsonify({
         'user_schedule': user_schedule.serialize()
     }), 200)
 
 
+@router_main.route('/users/<user_id>/user_schedules/<user_schedule_id>', methods=['PUT'])
+@require_jwt_token
+@require_same_user_id
+def update_user_schedule(user_id, user_schedule_id):
+    data = request.json or {}
+    user_schedule = None
+    if ObjectId.is_valid(user_schedule_id):
+        user_schedule = UserSchedule.objects(
+            id=user_schedule_id, user_id=user_id, deleted=False).first()
+    if user_schedule is None:
+        return (jsonify({
+            'message': 'User schedule not found'
+        }), 404)
+
+    expected_version = data.get("version", user_schedule.version)
+    if expected_version != user_schedule.version:
+        return (jsonify({
+            'message': 'User schedule was updated since this version',
+            'version': user_schedule.version,
+        }), 409)
+
+    try:
+        schedule_items = [ScheduleItem(**item) for item in data.get("schedule_items", [])]
+        for item in schedule_items:
+            item.validate()
+    except (FieldDoesNotExist, TypeError, ValidationError) as e:
+        return (jsonify({'message': str(e)}), 400)
+
+    old_items = user_schedule.schedule_items
+    old_items_hash = user_schedule.items_hash or ScheduleItemSet.store(old_items)
+    items_hash = ScheduleItemSet.store(schedule_items)
+    version = user_schedule.version + 1
+    updated = UserSchedule.objects(
+        id=user_schedule.id, version=user_schedule.version
+    ).update_one(
+        set__items_hash=items_hash,
+        set__item_count=len(schedule_items),
+        set__version=version,
+        unset__schedule_items=True
+    )
+    if not updated:
+        return (jsonify({
+            'message': 'User schedule was updated since this version'
+        }), 409)
+
+    change = UserScheduleVersion.record(
+        user_schedule.id,
+        version,
+        [item.serialize() for item in old_items],
+        [item.serialize() for item in schedule_items],
+        old_items_hash,
+        items_hash
+    )
+    invalidate_user_schedule(user_schedule_id)
+    return (jsonify({
+        'id': user_schedule_id,
+        **change.serialize(),
+    }), 200)
+
+
+@router_main.route('/users/<user_id>/user_schedules/<user_schedule_id>/versions')
+@require_jwt_token
+@require_same_user_id
+def get_user_schedule_versions(user_id, user_schedule_id):
+    if (not ObjectId.is_valid(user_schedule_id)
+            or not UserSchedule.objects(id=user_schedule_id, user_id=user_id)):
+        return (jsonify({
+            'message': 'User schedule not found'
+        }), 404)
+
+    versions = UserScheduleVersion.objects(
+        user_schedule_id=user_schedule_id).order_by("-version")
+    return (jsonify({
+        'versions': [version.serialize() for version in versions]
+    }), 200)
+
+
+@router_main.route('/users/<user_id>/user_schedules/<user_schedule_id>/versions/<int:version>')
+@require_jwt_token
+@require_same_user_id
+def get_user_schedule_version(user_id, user_schedule_id, version):
+    user_schedule = None
+    if ObjectId.is_valid(user_schedule_id):
+        user_schedule = UserSchedule.objects(
+            id=user_schedule_id, user_id=user_id).first()
+
+    schedule_items = None
+    if user_schedule is not None and version == user_schedule.version:
+        schedule_items = user_schedule.serialize()["schedule_items"]
+    elif user_schedule is not None and version < user_schedule.version:
+        schedule_items = UserScheduleVersion.get_items(user_schedule.id, version)
+    if schedule_items is None:
+        return (jsonify({
+            'message': 'User schedule version not found'
+        }), 404)
+
+    return (jsonify({
+        'id': user_schedule_id,
+        'version': version,
+        'schedule_items': schedule_items,
+    }), 200)
+
+
+MAX_BATCH_OPERATIONS = 100
+
+
+@router_main.route('/users/<user_id>/user_schedules:batch', methods=['POST'])
+@require_jwt_token
+@require_same_user_id
+def batch_user_schedules(user_id):
+    operations = (request.json or {}).get("operations")
+    if (not isinstance(operations, list) or len(operations) > MAX_BATCH_OPERATIONS
+            or not all(isinstance(operation, dict) for operation in operations)):
+        return (jsonify({
+            'message': f'operations must be a list of at most {MAX_BATCH_OPERATIONS} operations'
+        }), 400)
+
+    targets = [
+        operation.get("id") for operation in operations
+        if operation.get("op") in ("rename", "delete")
+        and ObjectId.is_valid(operation.get("id"))
+    ]
+    existing = {
+        str(data["_id"]) for data in UserSchedule.objects(
+            id__in=targets, user_id=user_id, deleted=False).only("id").as_pymongo()
+    }
+
+    results, requests, request_results = [], [], []
+    for operation in operations:
+        result = get_batch_request(user_id, operation, existing)
+        if "request" in result:
+            requests.append(result.pop("request"))
+            request_results.append(result)
+        results.append(result)
+
+    if requests:
+        try:
+            UserSchedule._get_collection().bulk_write(requests, ordered=True)
+        except BulkWriteError as e:
+            # Ordered writes stop at the first error
+            failed = e.details["writeErrors"][0]["index"]
+            for index, result in enumerate(request_results[failed:]):
+                result["status"] = 500 if index == 0 else 409
+                result["message"] = (
+                    "Write failed" if index == 0 else "Not run after a failed write")
+
+    for result in request_results:
+        if result["op"] != "create" and result["status"] < 300:
+            invalidate_user_schedule(result["id"])
+    return (jsonify({
+        "results": results
+    }), 200)
+
+
+def get_batch_request(user_id, operation, existing):
+    """Return the result of one batch operation, with its write as "request".
+
+    `existing` are the ids of the user's schedules still present at this
+    point of the batch, deleted ones are removed from it.
+    """
+    op = operation.get("op")
+    if op == "create":
+        name = operation.get("name")
+        if isinstance(name, str):
+            name = html.escape(name)
+        try:
+            user_schedule = UserSchedule(id=ObjectId(), user_id=user_id, name=name)
+            for item in operation.get("schedule_items", []):
+                user_schedule.add_schedule_item(**item)
+            user_schedule.validate()
+        except (FieldDoesNotExist, TypeError, ValidationError) as e:
+            return {"op": op, "status": 400, "message": str(e)}
+        user_schedule.store_schedule_items()
+        data = user_schedule.to_mongo().to_dict()
+        data.pop("schedule_items", None)
+        return {
+            "op": op,
+            "status": 201,
+            "id": str(user_schedule.id),
+            "request": InsertOne(data),
+        }
+
+    if op not in ("rename", "delete"):
+        return {"op": op, "status": 400, "message": "op must be create, rename or delete"}
+
+    user_schedule_id = operation.get("id")
+    if not isinstance(user_schedule_id, str):
+        return {"op": op, "status": 400, "message": "id must be a string"}
+    if user_schedule_id not in existing:
+        return {"op": op, "status": 404, "id": user_schedule_id,
+                "message": "User schedule not found"}
+
+    query = {"_id": ObjectId(user_schedule_id), "deleted": False}
+    if op == "delete":
+        existing.discard(user_schedule_id)
+        return {
+            "op": op,
+            "status": 204,
+            "id": user_schedule_id,
+            "request": UpdateOne(query, {"$set": {"deleted": True}}),
+        }
+
+    name = operation.get("name")
+    if isinstance(name, str):
+        name = html.escape(name)
+    if not isinstance(name, str) or len(name) > UserSchedule.name.max_length:
+        return {"op": op, "status": 400, "id": user_schedule_id,
+                "message": "name must be a string of at most "
+                           f"{UserSchedule.name.max_length} characters"}
+    return {
+        "op": op,
+        "status": 200,
+        "id": user_schedule_id,
+        "name": name,
+        "request": UpdateOne(query, {"$set": {"name": name}}),
+    }
+
+
 def get_app_config(varname):
     return app.config.get(varname)
+
+
+def make_json_response(body, status=200, cache_status=None):
+    response = app.response_class(
+        body, status=status, mimetype=app.config["JSONIFY_MIMETYPE"])
+    if cache_status is not None:
+        response.headers["X-Cache"] = cache_status
+    return response
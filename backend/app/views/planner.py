@@ -0,0 +1,178 @@
+import json
+import time
+
+from bson import ObjectId
+from flask import (
+    Blueprint,
+    current_app as app,
+    jsonify,
+    request
+)
+
+from app.conflicts import (
+    SLOT_MINUTES,
+    ScheduleMasks,
+    count_gap_slots,
+    describe_mask,
+    get_window_mask
+)
+from app.course_index import get_period_index
+from app.decorators import require_jwt_token
+from app.generator import ParallelScheduleSearch, ScheduleSearch, search_pool
+from models.period import Period, get_day_index, get_minutes
+
+
+router_planner = Blueprint('router_planner', __name__)
+
+
+def get_requested_period(data):
+    """Return (active Period of `data["major_id"]`, error response)."""
+    major_id = data.get("major_id")
+    if not isinstance(major_id, str) or not ObjectId.is_valid(major_id):
+        return None, (jsonify({
+            'message': 'major_id must be a major id'
+        }), 400)
+
+    period = Period.get_active(major_id, app.config["ACTIVE_PERIOD"])
+    if period is None:
+        return None, (jsonify({
+            'message': 'There is no course for this major on the active period'
+        }), 404)
+    return period, None
+
+
+def is_list_of(value, item_type):
+    return isinstance(value, list) and all(isinstance(item, item_type) for item in value)
+
+
+@router_planner.route('/conflicts', methods=['POST'])
+@require_jwt_token
+def find_conflicts():
+    data = request.json or {}
+    period, error = get_requested_period(data)
+    if error is not None:
+        return error
+
+    classes = data.get("classes", [])
+    if not is_list_of(classes, dict) or not all(
+            is_list_of([item.get("course"), item.get("class")], str)
+            for item in classes):
+        return (jsonify({
+            'message': 'classes must be a list of {"course", "class"} strings'
+        }), 400)
+
+    masks = get_period_index(period, ScheduleMasks)
+    classes = [(item["course"], item["class"]) for item in classes]
+    unknown = [key for key in classes if key not in masks.masks]
+    if unknown:
+        return (jsonify({
+            'message': 'Unknown classes',
+            'classes': [{"course": course, "class": class_} for course, class_ in unknown]
+        }), 400)
+
+    conflicts = []
+    for first, second, overlap in masks.find_conflicts(classes):
+        conflicts.append({
+            "classes": [
+                {"course": course, "class": class_}
+                for course, class_ in (first, second)
+            ],
+            "overlap": describe_mask(overlap),
+        })
+    return (jsonify({
+        "conflicts": conflicts
+    }), 200)
+
+
+MAX_GENERATED_SCHEDULES = 100
+MAX_GENERATOR_SECONDS = 5
+
+
+@router_planner.route('/schedules:generate', methods=['POST'])
+@require_jwt_token
+def generate_schedules():
+    data = request.json or {}
+    period, error = get_requested_period(data)
+    if error is not None:
+        return error
+
+    if not is_list_of(data.get("courses", []), str):
+        return (jsonify({
+            'message': 'courses must be a list of course names'
+        }), 400)
+
+    masks = get_period_index(period, ScheduleMasks)
+    course_names = list(dict.fromkeys(data.get("courses", [])))
+    unknown = [name for name in course_names if name not in masks.courses]
+    if unknown:
+        return (jsonify({
+            'message': 'Unknown courses',
+            'courses': unknown
+        }), 400)
+
+    preferences = data.get("preferences") or {}
+    if (not isinstance(preferences, dict)
+            or not is_list_of(preferences.get("free_days", []), str)):
+        return (jsonify({
+            'message': 'Invalid preferences'
+        }), 400)
+
+    free_days = [get_day_index(day) for day in preferences.get("free_days", [])]
+    earliest_start = preferences.get("earliest_start")
+    max_gap = preferences.get("max_gap")
+    if (None in free_days
+            or (earliest_start is not None and get_minutes(earliest_start) is None)
+            or (max_gap is not None and not isinstance(max_gap, int))):
+        return (jsonify({
+            'message': 'Invalid preferences'
+        }), 400)
+
+    try:
+        limit = int(data.get("limit", 20))
+        time_budget = float(data.get("time_budget", 2))
+    except (TypeError, ValueError):
+        return (jsonify({
+            'message': 'limit and time_budget must be numbers'
+        }), 400)
+    limit = max(1, min(limit, MAX_GENERATED_SCHEDULES))
+    time_budget = max(0, min(time_budget, MAX_GENERATOR_SECONDS))
+
+    courses = [(name, masks.courses[name]) for name in course_names]
+    options = dict(
+        forbidden=get_window_mask(
+            free_days,
+            get_minutes(earliest_start) if earliest_start is not None else None
+        ),
+        max_gap=max_gap,
+        deadline=time.monotonic() + time_budget
+    )
+    if (search_pool.processes > 1
+            and len(courses) >= app.config["GENERATOR_PARALLEL_MIN_COURSES"]):
+        search = ParallelScheduleSearch(courses, limit=limit, **options)
+    else:
+        search = ScheduleSearch(courses, **options)
+
+    def generate():
+        count = 0
+        if course_names:
+            for timetable in search.run():
+                mask = 0
+                for key in timetable:
+                    mask |= masks.masks[key]
+                yield json.dumps({
+                    "classes": [
+                        {"course": course, "class": class_}
+                        for course, class_ in timetable
+                    ],
+                    "gap_minutes": count_gap_slots(mask) * SLOT_MINUTES,
+                }) + "\n"
+                count += 1
+                if count == limit:
+                    break
+        yield json.dumps({
+            "done": True,
+            "count": count,
+            "timed_out": search.timed_out,
+        }) + "\n"
+
+    return app.response_class(generate(), mimetype="application/x-ndjson")
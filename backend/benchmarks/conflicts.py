@@ -0,0 +1,89 @@
+"""Compare bitmask conflict checks with pairwise string parsing.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.conflicts [--selected 50] [--classes 3000]
+
+Works on synthetic courses in memory, no database is needed.
+"""
+import argparse
+import random
+import time
+
+from app.conflicts import ScheduleMasks
+from models.period import DAYS, format_minutes, get_minutes
+
+
+def create_period(n_classes, classes_per_course=10):
+    courses = []
+    for course in range(n_classes // classes_per_course):
+        classes = []
+        for class_ in range(classes_per_course):
+            items = []
+            for day in random.sample(DAYS[:5], 2):
+                start = random.randrange(7 * 60, 17 * 60, 10)
+                items.append({
+                    "day": day,
+                    "start": format_minutes(start),
+                    "end": format_minutes(start + random.choice([50, 100, 150])),
+                    "room": "2.2304",
+                })
+            classes.append({"name": f"Class {class_}", "schedule_items": items})
+        courses.append({"name": f"Course {course}", "classes": classes})
+    return {"name": "bench", "is_detail": True, "courses": courses}
+
+
+def find_conflicts_by_parsing(period, selected):
+    classes = {
+        (course["name"], class_["name"]): class_["schedule_items"]
+        for course in period["courses"]
+        for class_ in course["classes"]
+    }
+    conflicts = []
+    for i, first in enumerate(selected):
+        for second in selected[i + 1:]:
+            for a in classes[first]:
+                if any(
+                    a["day"] == b["day"]
+                    and get_minutes(a["start"]) < get_minutes(b["end"])
+                    and get_minutes(b["start"]) < get_minutes(a["end"])
+                    for b in classes[second]
+                ):
+                    conflicts.append((first, second))
+                    break
+    return conflicts
+
+
+def timeit(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=3000)
+    parser.add_argument("--selected", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    period = create_period(args.classes)
+    start = time.perf_counter()
+    masks = ScheduleMasks(period)
+    print(f"Built masks for {len(masks.masks)} classes in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms (once per Period version)")
+
+    selected = random.sample(list(masks.masks), args.selected)
+    parsing, expected = timeit(
+        lambda: find_conflicts_by_parsing(period, selected), args.repeat)
+    bitmask, conflicts = timeit(lambda: masks.find_conflicts(selected), args.repeat)
+    assert [(a, b) for a, b, _ in conflicts] == expected
+
+    print(f"{args.selected} selected classes, {len(conflicts)} clashing pairs")
+    print(f" string parsing: {parsing * 1000:8.3f} ms")
+    print(f"       bitmasks: {bitmask * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare serial and process-pool schedule generation.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.generator [--courses 10] [--sections 2 1 30 ...] [--processes 1 2 4]
+
+Works on synthetic courses in memory, no database is needed. Section
+counts are cycled over the courses, the default mixes required courses
+with one or two parallel classes and electives with many. The search
+runs until `--limit` timetables are found or the whole tree is explored,
+so the speedup shows on machines with at least as many cores as processes.
+"""
+import argparse
+import os
+import random
+import time
+
+from app.conflicts import get_item_mask
+from app.generator import ParallelScheduleSearch, ScheduleSearch, SearchPool
+
+
+def create_courses(n_courses, section_counts):
+    courses = []
+    for course in range(n_courses):
+        sections = []
+        for section in range(section_counts[course % len(section_counts)]):
+            mask = 0
+            for day in random.sample(range(5), 2):
+                # Classes start on the 100 minute lecture blocks of a day
+                start = random.randrange(8 * 60, 17 * 60, 100)
+                mask |= get_item_mask(day, start, start + random.choice([50, 100]))
+            sections.append((f"Class {section}", mask))
+        courses.append((f"Course {course}", sections))
+    return courses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=10)
+    parser.add_argument("--sections", type=int, nargs="+",
+                        default=[2, 1, 30, 2, 20, 3, 25, 2, 15, 20])
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--max-gap", type=int, default=300,
+                        help="idle minutes allowed, makes most branches dead ends")
+    parser.add_argument("--processes", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    courses = create_courses(args.courses, args.sections)
+    print(f"{args.courses} courses with {args.sections} sections, "
+          f"{os.cpu_count()} cores")
+    # Splitting on the most constrained course would give this many subtrees
+    _, options = ScheduleSearch(courses)._pick_course(range(len(courses)), 0)
+    print(f"narrowest course split: {len(options)} subtrees")
+
+    start = time.perf_counter()
+    count = sum(1 for _ in zip(range(args.limit), ScheduleSearch(courses, max_gap=args.max_gap).run()))
+    serial = time.perf_counter() - start
+    print(f"         serial: {serial * 1000:9.1f} ms  {count} timetables")
+
+    for processes in args.processes:
+        pool = SearchPool(processes=processes)
+        pool.get_executor().submit(int).result()  # start the workers
+        start = time.perf_counter()
+        search = ParallelScheduleSearch(
+            courses, max_gap=args.max_gap, pool=pool, limit=args.limit)
+        count = sum(1 for _ in search.run())
+        elapsed = time.perf_counter() - start
+        pool.shutdown()
+        subtrees = len(search.split(processes * search.SUBTREES_PER_PROCESS))
+        print(f"{processes:2d} process(es): {elapsed * 1000:9.1f} ms  {count} timetables"
+              f"  {subtrees} subtrees  x{serial / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
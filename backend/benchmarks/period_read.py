@@ -0,0 +1,100 @@
+"""Compare the hydrated and raw read paths for a large Period.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.period_read [--host mongodb://...] [--classes 3000]
+
+Defaults to an in-memory mongomock database. Point `--host` at a real
+MongoDB to include wire and BSON decoding costs.
+"""
+import argparse
+import random
+import string
+import time
+import tracemalloc
+
+from mongoengine import connect, disconnect
+
+from models.major import Major
+from models.period import Class, Course, Period, ScheduleItem, encode_payload
+
+DAYS = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat"]
+TIMES = [("08.00", "09.40"), ("10.00", "11.40"), ("13.00", "14.40"), ("16.00", "17.40")]
+
+
+def random_name(length):
+    return "".join(random.choice(string.ascii_letters) for _ in range(length))
+
+
+def create_period(n_classes, classes_per_course=20):
+    major = Major(name="Benchmark", kd_org="00.00.00.00").save()
+    courses = []
+    for _ in range(n_classes // classes_per_course):
+        classes = []
+        for _ in range(classes_per_course):
+            schedule_items = []
+            for day in random.sample(DAYS, 2):
+                start, end = random.choice(TIMES)
+                schedule_items.append(ScheduleItem(
+                    day=day, start=start, end=end, room=random_name(12)))
+            classes.append(Class(
+                name=random_name(24),
+                schedule_items=schedule_items,
+                lecturer=[random_name(30), random_name(30)],
+            ))
+        courses.append(Course(
+            name=random_name(32), credit=3, term=random.randint(1, 8), classes=classes))
+
+    return Period(major_id=major, name="bench", is_detail=True, courses=courses).save()
+
+
+def read_hydrated(period_id):
+    return encode_payload(Period.objects(id=period_id).first().serialize())
+
+
+def read_raw(period_id):
+    data = Period.objects(id=period_id).only(
+        "name", "is_detail", "courses").as_pymongo().first()
+    return encode_payload(Period.serialize_raw(data))
+
+
+def measure(func, period_id, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(period_id)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(period_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(timings), sorted(timings)[len(timings) // 2], peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="mongomock://localhost")
+    parser.add_argument("--classes", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    disconnect()
+    db = connect("benchmark_period_read", host=args.host)
+    try:
+        period = create_period(args.classes)
+        assert read_hydrated(period.id) == read_raw(period.id)
+
+        print(f"Period with {args.classes} classes, best/median of {args.repeat}")
+        for label, func in (("hydrated", read_hydrated), ("raw", read_raw)):
+            best, median, peak = measure(func, period.id, args.repeat)
+            print(f"{label:>9}: best {best * 1000:8.1f} ms  "
+                  f"median {median * 1000:8.1f} ms  peak {peak / 2 ** 20:6.1f} MiB")
+    finally:
+        db.drop_database("benchmark_period_read")
+        disconnect()
+
+
+if __name__ == "__main__":
+    main()
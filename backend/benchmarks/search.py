@@ -0,0 +1,72 @@
+"""Measure SearchIndex build time and per-query latency.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.search [--majors 60] [--classes 2000]
+
+Indexes synthetic courses in memory, no database is needed.
+"""
+import argparse
+import random
+import string
+import time
+
+from app.search import SearchIndex
+
+WORDS = [
+    "".join(random.choice(string.ascii_lowercase) for _ in range(random.randint(4, 10)))
+    for _ in range(3000)
+]
+
+
+def random_text(words):
+    return " ".join(random.choice(WORDS).capitalize() for _ in range(words))
+
+
+def create_courses(n_classes, classes_per_course=10):
+    return [
+        {
+            "name": random_text(3),
+            "classes": [
+                {"name": random_text(2), "lecturer": [random_text(2), random_text(3)]}
+                for _ in range(classes_per_course)
+            ],
+        }
+        for _ in range(n_classes // classes_per_course)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--majors", type=int, default=60)
+    parser.add_argument("--classes", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    for major in range(args.majors):
+        index.update_period(major, str(major), "v1", create_courses(args.classes))
+    build = time.perf_counter() - start
+    print(f"Indexed {len(index.documents)} classes, "
+          f"{len(index.vocabulary)} tokens in {build:.2f} s")
+
+    start = time.perf_counter()
+    index.update_period(0, "0", "v2", create_courses(args.classes))
+    print(f"Re-indexed one major in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for label, make_query in (
+        ("one word", lambda: random.choice(WORDS)),
+        ("two words", lambda: f"{random.choice(WORDS)} {random.choice(WORDS)}"),
+        ("3-letter prefix", lambda: random.choice(WORDS)[:3]),
+    ):
+        queries = [make_query() for _ in range(args.queries)]
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query)
+        elapsed = (time.perf_counter() - start) / len(queries)
+        print(f"{label:>16}: {elapsed * 1e6:8.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
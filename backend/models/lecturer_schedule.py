@@ -0,0 +1,70 @@
+import mongoengine as mongo
+
+
+def get_lecturer_key(name):
+    """Return the case and whitespace insensitive key of a lecturer name."""
+    return " ".join((name or "").lower().split())
+
+
+class LecturerSchedule(mongo.Document):
+    """Classes one lecturer teaches in one Period.
+
+    Rebuilt from the Period on every save, so the timetable of a lecturer
+    across all majors is one indexed query. `classes` are
+    {"course", "class", "schedule_items"} with stored schedule items.
+    """
+
+    lecturer_key = mongo.StringField(max_length=128)
+    lecturer = mongo.StringField(max_length=128)
+    period_id = mongo.ReferenceField("Period")
+    period_name = mongo.StringField(max_length=16)
+    major_id = mongo.ReferenceField("Major")
+    is_detail = mongo.BooleanField(default=False)
+    classes = mongo.ListField(mongo.DictField())
+
+    meta = {
+        "indexes": [
+            ("period_name", "lecturer_key"),
+            "period_id",
+        ],
+        "auto_create_index": False,  # see `flask cron ensure_indexes`
+    }
+
+    @classmethod
+    def update_period(cls, data):
+        """Replace the entries of a Period by those of its stored document."""
+        cls.objects(period_id=data["_id"]).delete()
+
+        lecturers = {}
+        for course in data.get("courses", []):
+            for class_ in course.get("classes", []):
+                entry = {
+                    "course": course.get("name"),
+                    "class": class_.get("name"),
+                    "schedule_items": [
+                        dict(item) for item in class_.get("schedule_items", [])
+                    ],
+                }
+                for lecturer in class_.get("lecturer", []):
+                    key = get_lecturer_key(lecturer)
+                    if key:
+                        lecturers.setdefault(key, (lecturer, []))[1].append(entry)
+
+        documents = [
+            cls(
+                lecturer_key=key,
+                lecturer=lecturer,
+                period_id=data["_id"],
+                period_name=data.get("name"),
+                major_id=data.get("major_id"),
+                is_detail=data.get("is_detail", False),
+                classes=classes,
+            )
+            for key, (lecturer, classes) in lecturers.items()
+        ]
+        if documents:
+            cls.objects.insert(documents, load_bulk=False)
+
+    @classmethod
+    def remove_period(cls, period_id):
+        cls.objects(period_id=period_id).delete()
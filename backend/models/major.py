@@ -4,3 +4,10 @@ import mongoengine as mongo
 class Major(mongo.Document):
     name = mongo.StringField(max_length=256)
     kd_org = mongo.StringField(max_length=16)  # some code for study program
+
+    meta = {
+        "indexes": [
+            {"fields": ["kd_org"], "unique": True, "sparse": True},
+        ],
+        "auto_create_index": False,  # see `flask cron ensure_indexes`
+    }
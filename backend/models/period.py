@@ -1,11 +1,77 @@
+import gzip
+import hashlib
+import json
+import time
+
 import mongoengine as mongo
 
+from models.lecturer_schedule import LecturerSchedule
+from models.period_change import PeriodChange
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always stored
+    brotli = None
+
+DAYS = ("Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu")
+_DAY_INDEX = {day.lower(): index for index, day in enumerate(DAYS)}
+
+
+def get_day_index(day):
+    """Return 0 (Senin) to 6 (Minggu), or None for an unknown day."""
+    if not day:
+        return None
+    return _DAY_INDEX.get("".join(c for c in day.lower() if c.isalpha()))
+
+
+def get_minutes(time):
+    """Return minutes since midnight for "HH.MM" (or "HH:MM"), else None."""
+    try:
+        hour, minute = time.strip().replace(":", ".").split(".")
+        hour, minute = int(hour), int(minute)
+    except (AttributeError, ValueError):
+        return None
+    if not (0 <= hour <= 24 and 0 <= minute < 60):
+        return None
+    return hour * 60 + minute
+
+
+def format_minutes(minutes):
+    return f"{minutes // 60:02d}.{minutes % 60:02d}"
+
+
+def get_item_times(item):
+    """Return (day index, start minutes, end minutes) of a schedule item.
+
+    `item` is a stored or serialized schedule item dict. The integers are
+    used when stored, otherwise the strings are parsed.
+    """
+    day = item.get("day_index")
+    start = item.get("start_minutes")
+    end = item.get("end_minutes")
+    if day is None:
+        day = get_day_index(item.get("day"))
+    if start is None:
+        start = get_minutes(item.get("start"))
+    if end is None:
+        end = get_minutes(item.get("end"))
+    return day, start, end
+
 
 class ScheduleItem(mongo.EmbeddedDocument):
     day = mongo.StringField(max_length=16)
     start = mongo.StringField(max_length=16)
     end = mongo.StringField(max_length=16)
     room = mongo.StringField(max_length=64)
+    # Parsed `day`, `start` and `end`, filled on validation
+    day_index = mongo.IntField(min_value=0, max_value=6)
+    start_minutes = mongo.IntField()
+    end_minutes = mongo.IntField()
+
+    def clean(self):
+        self.day_index = get_day_index(self.day)
+        self.start_minutes = get_minutes(self.start)
+        self.end_minutes = get_minutes(self.end)
 
     def serialize(self):
         return {
@@ -15,6 +81,16 @@ class ScheduleItem(mongo.EmbeddedDocument):
             "room": self.room,
         }
 
+    @staticmethod
+    def serialize_raw(data):
+        """Same as `serialize()`, straight from the stored BSON document."""
+        return {
+            "day": data.get("day"),
+            "start": data.get("start"),
+            "end": data.get("end"),
+            "room": data.get("room"),
+        }
+
 
 class Class(mongo.EmbeddedDocument):
     name = mongo.StringField(max_length=128)
@@ -34,6 +110,17 @@ class Class(mongo.EmbeddedDocument):
             "schedule_items": self.__get_schedule_items(),
         }
 
+    @staticmethod
+    def serialize_raw(data):
+        return {
+            "name": data.get("name"),
+            "lecturer": data.get("lecturer", []),
+            "schedule_items": [
+                ScheduleItem.serialize_raw(item)
+                for item in data.get("schedule_items", [])
+            ],
+        }
+
 
 class Course(mongo.EmbeddedDocument):
     name = mongo.StringField(max_length=128)
@@ -55,12 +142,130 @@ class Course(mongo.EmbeddedDocument):
             "classes": self.__get_classes(),
         }
 
+    @staticmethod
+    def serialize_raw(data):
+        return {
+            "name": data.get("name"),
+            "credit": data.get("credit"),
+            "term": data.get("term"),
+            "classes": [
+                Class.serialize_raw(class_)
+                for class_ in data.get("classes", [])
+            ],
+        }
+
 
 class Period(mongo.Document):
     major_id = mongo.ReferenceField("Major")
     name = mongo.StringField(max_length=16)
     is_detail = mongo.BooleanField(default=False)
     courses = mongo.ListField(mongo.EmbeddedDocumentField(Course))
+    version = mongo.StringField(max_length=40)  # content hash, used as ETag
+    # Millisecond stamp bumped whenever the content changes, see PeriodChange
+    revision = mongo.IntField(default=0)
+    # Pre-compressed `serialize()` JSON, built on save
+    payload_gzip = mongo.BinaryField()
+    payload_br = mongo.BinaryField()
+
+    meta = {
+        "indexes": [
+            ("major_id", "name", "is_detail", "version"),
+        ],
+        "auto_create_index": False,  # see `flask cron ensure_indexes`
+    }
+
+    @classmethod
+    def get_active(cls, major_id, name, courses=False):
+        """Return the detail Period of a major if any, else the general one.
+
+        Resolved in a single indexed query. Unless `courses` is true only
+        metadata (major_id, name, is_detail, version, revision) is loaded.
+        """
+        queryset = cls.objects(major_id=major_id, name=name).order_by("-is_detail")
+        if not courses:
+            queryset = queryset.only(
+                "id", "major_id", "name", "is_detail", "version", "revision")
+        return queryset.first()
+
+    def save(self, *args, **kwargs):
+        # Validate before hashing so malformed courses fail with ValidationError
+        if kwargs.get("validate", True):
+            self.validate(clean=kwargs.get("clean", True))
+            kwargs["validate"] = False
+
+        previous_version = self.version
+        previous_revision = self.revision
+        content = self.encode()
+        self.version = hashlib.sha1(content).hexdigest()
+        if self.version != previous_version:
+            self.revision = max(previous_revision + 1, int(time.time() * 1000))
+        payloads = compress_payload(content)
+        self.payload_gzip = payloads["gzip"]
+        self.payload_br = payloads.get("br")
+        result = super().save(*args, **kwargs)
+        if self.version != previous_version:
+            LecturerSchedule.update_period(self.to_mongo())
+
+        old_courses = getattr(self, "_replaced_courses", None)
+        self._replaced_courses = None
+        if (old_courses is not None) and (self.revision != previous_revision):
+            PeriodChange.record(
+                self.id,
+                previous_revision,
+                self.revision,
+                old_courses,
+                [course.serialize() for course in self.courses]
+            )
+        return result
+
+    def delete(self, *args, **kwargs):
+        LecturerSchedule.remove_period(self.id)
+        return super().delete(*args, **kwargs)
+
+    def replace_courses(self, courses):
+        """Replace the courses, logging the difference on the next save."""
+        data = None
+        if self.id is not None:
+            data = Period.objects(id=self.id).only("courses").as_pymongo().first()
+
+        if data is not None:
+            self._replaced_courses = [
+                Course.serialize_raw(course)
+                for course in data.get("courses", [])
+            ]
+        self.courses = courses
+
+    def encode(self):
+        return encode_payload(self.serialize())
+
+    def get_payloads(self):
+        """Return `serialize()` JSON keyed by content encoding.
+
+        Periods saved before the payloads were stored are encoded from their
+        raw courses, and the payloads and version are stored on first read.
+        """
+        if self.payload_gzip is None:
+            data = Period.objects(id=self.id).only(
+                "name", "is_detail", "courses").as_pymongo().first()
+            content = encode_payload(Period.serialize_raw(data))
+            payloads = compress_payload(content)
+            self.version = hashlib.sha1(content).hexdigest()
+            self.payload_gzip = payloads["gzip"]
+            self.payload_br = payloads.get("br")
+            Period.objects(id=self.id, payload_gzip=None).update_one(
+                set__version=self.version,
+                set__payload_gzip=self.payload_gzip,
+                set__payload_br=self.payload_br
+            )
+            return {"identity": content, **payloads}
+
+        payloads = {
+            "identity": gzip.decompress(self.payload_gzip),
+            "gzip": self.payload_gzip,
+        }
+        if self.payload_br is not None:
+            payloads["br"] = self.payload_br
+        return payloads
 
     def __get_courses(self):
         data = []
@@ -75,3 +280,30 @@ class Period(mongo.Document):
             "is_detail": self.is_detail,
             "courses": self.__get_courses(),
         }
+
+    @staticmethod
+    def serialize_raw(data):
+        """Same as `serialize()` without hydrating the embedded documents.
+
+        `data` is the document as returned by `as_pymongo()`.
+        """
+        return {
+            "name": data.get("name"),
+            "is_detail": data.get("is_detail", False),
+            "courses": [
+                Course.serialize_raw(course)
+                for course in data.get("courses", [])
+            ],
+        }
+
+
+def encode_payload(data):
+    content = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return content.encode()
+
+
+def compress_payload(content):
+    payloads = {"gzip": gzip.compress(content)}
+    if brotli is not None:
+        payloads["br"] = brotli.compress(content)
+    return payloads
@@ -0,0 +1,102 @@
+import mongoengine as mongo
+
+CHANGE_LOG_SIZE = 20  # entries kept per period, older ones are compacted
+
+
+class PeriodChange(mongo.Document):
+    """Courses added, removed or modified by one update of a Period.
+
+    Moves the period from `previous_revision` to `revision`. Courses are
+    identified by name and stored in their serialized form.
+    """
+
+    period_id = mongo.ReferenceField("Period")
+    revision = mongo.IntField()
+    previous_revision = mongo.IntField()
+    added = mongo.ListField(mongo.DictField())
+    modified = mongo.ListField(mongo.DictField())
+    removed = mongo.ListField(mongo.StringField(max_length=128))
+    # Set when courses cannot be told apart by name, clients must reload
+    full_reload = mongo.BooleanField(default=False)
+
+    meta = {
+        "indexes": [
+            ("period_id", "-revision"),
+        ],
+        "auto_create_index": False,  # see `flask cron ensure_indexes`
+    }
+
+    @classmethod
+    def record(cls, period_id, previous_revision, revision, old_courses, new_courses):
+        change = cls(
+            period_id=period_id,
+            revision=revision,
+            previous_revision=previous_revision,
+        )
+        old_names = [course["name"] for course in old_courses]
+        new_names = [course["name"] for course in new_courses]
+        if len(set(old_names)) < len(old_names) or len(set(new_names)) < len(new_names):
+            change.full_reload = True
+        else:
+            old = dict(zip(old_names, old_courses))
+            new = dict(zip(new_names, new_courses))
+            change.added = [new[name] for name in new_names if name not in old]
+            change.modified = [
+                new[name] for name in new_names
+                if name in old and old[name] != new[name]
+            ]
+            change.removed = [name for name in old_names if name not in new]
+        change.save()
+
+        oldest_kept = cls.objects(period_id=period_id).order_by(
+            "-revision").skip(CHANGE_LOG_SIZE - 1).first()
+        if oldest_kept is not None:
+            cls.objects(period_id=period_id,
+                        revision__lt=oldest_kept.revision).delete()
+        return change
+
+    @classmethod
+    def get_delta(cls, period_id, since, revision):
+        """Merge the changes from revision `since` up to `revision`.
+
+        Returns None when the log no longer covers `since` and the client
+        has to download the full course list.
+        """
+        if since == revision:
+            return {"added": [], "modified": [], "removed": []}
+        if since > revision:
+            return None
+
+        changes = cls.objects(period_id=period_id, revision__gt=since,
+                              revision__lte=revision).order_by("revision")
+        expected_revision = since
+        states = {}
+        for change in changes:
+            if change.previous_revision != expected_revision or change.full_reload:
+                return None
+            expected_revision = change.revision
+
+            # Track per course whether the client had it at `since`
+            for course in change.added:
+                client_has, _ = states.get(course["name"], (False, None))
+                states[course["name"]] = (client_has, course)
+            for course in change.modified:
+                client_has, _ = states.get(course["name"], (True, None))
+                states[course["name"]] = (client_has, course)
+            for name in change.removed:
+                client_has, _ = states.get(name, (True, None))
+                states[name] = (client_has, None)
+
+        if expected_revision != revision:
+            return None
+
+        delta = {"added": [], "modified": [], "removed": []}
+        for name, (client_has, course) in states.items():
+            if course is None:
+                if client_has:
+                    delta["removed"].append(name)
+            elif client_has:
+                delta["modified"].append(course)
+            else:
+                delta["added"].append(course)
+        return delta
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+
+import mongoengine as mongo
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+MAX_ATTEMPTS = 3
+
+
+class ScrapeJob(mongo.Document):
+    """Queued scrape of the courses of one major for one period.
+
+    There is one job per major and period. It is queued again when a login
+    finds the Period still missing or not detailed, at most once every
+    `retry_interval` seconds. A failed attempt is retried after a delay
+    doubling with every attempt. A running job whose worker died is claimed
+    again once `locked_until` passed.
+    """
+
+    major_id = mongo.ReferenceField("Major")
+    kd_org = mongo.StringField(max_length=16)
+    period_name = mongo.StringField(max_length=16)
+    status = mongo.StringField(
+        max_length=8, choices=(PENDING, RUNNING, DONE, FAILED), default=PENDING)
+    attempts = mongo.IntField(default=0)
+    error = mongo.StringField()
+    created_at = mongo.DateTimeField(default=datetime.now)
+    queued_at = mongo.DateTimeField(default=datetime.now)  # runnable from then
+    locked_until = mongo.DateTimeField()
+    finished_at = mongo.DateTimeField()
+
+    meta = {
+        "indexes": [
+            {"fields": ["major_id", "period_name"], "unique": True},
+            ("status", "queued_at"),
+        ],
+        "auto_create_index": False,  # see `flask cron ensure_indexes`
+    }
+
+    @classmethod
+    def enqueue(cls, major, period_name, retry_interval=600):
+        """Queue a scrape unless one is queued, running or recently finished."""
+        job = cls.objects(major_id=major.id, period_name=period_name).first()
+        if job is None:
+            try:
+                return cls(
+                    major_id=major.id, kd_org=major.kd_org, period_name=period_name
+                ).save(force_insert=True)
+            except mongo.NotUniqueError:  # queued by a concurrent login
+                return cls.objects(major_id=major.id, period_name=period_name).first()
+
+        now = datetime.now()
+        if (job.status in (DONE, FAILED)
+                and job.finished_at < now - timedelta(seconds=retry_interval)):
+            cls.objects(id=job.id, status=job.status).update_one(
+                set__status=PENDING,
+                set__attempts=0,
+                set__queued_at=now,
+                unset__error=True
+            )
+            job.reload()
+        return job
+
+    @classmethod
+    def claim(cls, lock_seconds=300):
+        """Atomically take the oldest runnable job, None if there is none."""
+        now = datetime.now()
+        return cls.objects(
+            mongo.Q(status=PENDING, queued_at__lte=now)
+            | mongo.Q(status=RUNNING, locked_until__lt=now)
+        ).order_by("queued_at").modify(
+            new=True,
+            set__status=RUNNING,
+            set__locked_until=now + timedelta(seconds=lock_seconds),
+            inc__attempts=1
+        )
+
+    def finish(self, error=None, retry_delay=60):
+        """Mark the job done, or pending again after a failed attempt.
+
+        The n-th failed attempt is retried `retry_delay * 2 ** (n - 1)`
+        seconds later.
+        """
+        now = datetime.now()
+        queued_at = self.queued_at
+        if error is None:
+            status = DONE
+        elif self.attempts < MAX_ATTEMPTS:
+            status = PENDING
+            queued_at = now + timedelta(seconds=retry_delay * 2 ** (self.attempts - 1))
+        else:
+            status = FAILED
+        self.update(
+            set__status=status,
+            set__error=error,
+            set__queued_at=queued_at,
+            set__finished_at=now,
+            unset__locked_until=True
+        )
+        self.reload()
+
+    def serialize(self):
+        return {
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+            "queued_at": self.queued_at,
+            "finished_at": self.finished_at,
+        }
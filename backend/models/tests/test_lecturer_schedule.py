@@ -0,0 +1,46 @@
+import pytest
+
+from models.lecturer_schedule import LecturerSchedule, get_lecturer_key
+from models.major import Major
+from models.period import Class, Course, Period, ScheduleItem
+from .test_utils import TestBase
+
+
+@pytest.mark.usefixtures("mongo")
+class TestLecturerSchedule(TestBase):
+    def create_period(self, classes):
+        return Period.objects().create(
+            major_id=Major.objects().create(name="Major", kd_org="KD_ORG"),
+            name="Period",
+            is_detail=True,
+            courses=[Course(name="Basis Data", classes=classes)],
+        )
+
+    def test_lecturer_key(self):
+        assert get_lecturer_key("  Budi   SANTOSO ") == "budi santoso"
+        assert get_lecturer_key(None) == ""
+
+    def test_period_save_indexes_lecturers(self):
+        period = self.create_period([
+            Class(name="Basdat - A", lecturer=["Budi Santoso", "Ani"], schedule_items=[
+                ScheduleItem(day="Senin", start="08.00", end="09.40", room="2.2304")]),
+            Class(name="Basdat - B", lecturer=["budi  santoso"]),
+        ])
+
+        schedule = LecturerSchedule.objects(lecturer_key="budi santoso").first()
+        assert schedule.period_id.id == period.id
+        assert schedule.major_id.id == period.major_id.id
+        assert schedule.period_name == "Period"
+        assert [class_["class"] for class_ in schedule.classes] == [
+            "Basdat - A", "Basdat - B"]
+        item = schedule.classes[0]["schedule_items"][0]
+        assert (item["day_index"], item["start_minutes"], item["room"]) == (0, 480, "2.2304")
+        assert len(LecturerSchedule.objects(period_id=period.id)) == 2
+
+        period.replace_courses([Course(name="Basis Data", classes=[
+            Class(name="Basdat - A", lecturer=["Ani"])])])
+        period.save()
+        assert [schedule.lecturer_key for schedule in LecturerSchedule.objects()] == ["ani"]
+
+        period.delete()
+        assert len(LecturerSchedule.objects()) == 0
@@ -1,3 +1,5 @@
+import gzip
+import json
 import random
 
 import pytest
@@ -66,6 +68,19 @@ class TestScheduleItem(TestBase):
                     room=case["room"],
                 ).validate()
 
+    def test_validation_fills_parsed_times(self):
+        schedule_item = ScheduleItem(day="Rabu", start="08.00", end="09.40")
+        schedule_item.validate()
+        assert schedule_item.day_index == 2
+        assert schedule_item.start_minutes == 480
+        assert schedule_item.end_minutes == 580
+        assert "day_index" not in schedule_item.serialize()
+
+        schedule_item = ScheduleItem(day="Monday", start="Start", end="End")
+        schedule_item.validate()
+        assert schedule_item.day_index is None
+        assert schedule_item.start_minutes is None
+
 
 @pytest.mark.usefixtures("mongo")
 class TestClass(TestBase):
@@ -389,3 +404,93 @@ class TestPeriod(TestBase):
                     name=case["name"],
                     courses=case["courses"],
                 ).save()
+
+    def test_period_version_changes_with_content(self):
+        period = Period.objects().create(
+            major_id=self.generate_random_major_item().save(),
+            name="Period",
+            is_detail=True,
+            courses=[self.generate_random_course_item()],
+        )
+        version = period.version
+        assert version is not None
+
+        period.save()
+        assert period.version == version
+
+        period.courses.append(self.generate_random_course_item())
+        period.save()
+        assert period.version != version
+        assert len(Period.objects(version=period.version)) == 1
+
+    def test_period_payloads_match_serialization(self):
+        period = Period.objects().create(
+            major_id=self.generate_random_major_item().save(),
+            name="Period",
+            is_detail=True,
+            courses=[self.generate_random_course_item()],
+        )
+
+        fetched_period = Period.objects(id=period.id).exclude("courses").first()
+        payloads = fetched_period.get_payloads()
+
+        assert json.loads(payloads["identity"]) == period.serialize()
+        assert gzip.decompress(payloads["gzip"]) == payloads["identity"]
+
+    def test_serialize_raw_matches_serialize(self):
+        period = Period.objects().create(
+            major_id=self.generate_random_major_item().save(),
+            name="Period",
+            is_detail=True,
+            courses=[self.generate_random_course_item() for _ in range(3)]
+            + [Course(name="Empty Course")],
+        )
+
+        data = Period.objects(id=period.id).as_pymongo().first()
+        assert Period.serialize_raw(data) == period.serialize()
+
+    def test_legacy_period_payloads_are_built_from_raw_document(self):
+        period = Period.objects().create(
+            major_id=self.generate_random_major_item().save(),
+            name="Period",
+            is_detail=True,
+            courses=[self.generate_random_course_item()],
+        )
+        Period._get_collection().update_one(
+            {"_id": period.id}, {"$unset": {"payload_gzip": "", "payload_br": ""}}
+        )
+
+        fetched_period = Period.objects(id=period.id).exclude("courses").first()
+        assert fetched_period.payload_gzip is None
+
+        payloads = fetched_period.get_payloads()
+        assert payloads["identity"] == period.encode()
+        assert gzip.decompress(payloads["gzip"]) == payloads["identity"]
+
+    def test_get_active_prefers_detail_period(self):
+        major = self.generate_random_major_item().save()
+        general = Period.objects().create(
+            major_id=major, name="Period", is_detail=False, courses=[]
+        )
+
+        period = Period.get_active(major.id, "Period")
+        assert period.id == general.id
+        assert not period.is_detail
+
+        detail = Period.objects().create(
+            major_id=major,
+            name="Period",
+            is_detail=True,
+            courses=[self.generate_random_course_item()],
+        )
+
+        period = Period.get_active(major.id, "Period")
+        assert period.id == detail.id
+        assert period.is_detail
+        assert period.version == detail.version
+        assert period.courses == []
+
+        period = Period.get_active(major.id, "Period", courses=True)
+        assert period.courses == detail.courses
+
+        assert Period.get_active(major.id, "Other Period") is None
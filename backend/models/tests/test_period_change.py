@@ -0,0 +1,90 @@
+import pytest
+
+from models import period_change
+from models.major import Major
+from models.period import Class, Course, Period
+from models.period_change import PeriodChange
+from .test_utils import TestBase
+
+
+@pytest.mark.usefixtures("mongo")
+class TestPeriodChange(TestBase):
+    @classmethod
+    def generate_course(cls, name, class_name="A"):
+        return Course(name=name, credit=3, term=1, classes=[Class(name=class_name)])
+
+    def create_period(self, names):
+        return Period.objects().create(
+            major_id=Major.objects().create(name="Major", kd_org="KD_ORG"),
+            name="Period",
+            is_detail=True,
+            courses=[self.generate_course(name) for name in names],
+        )
+
+    def update_period(self, period, courses):
+        period.replace_courses(courses)
+        period.save()
+        return period.revision
+
+    def test_replace_courses_records_change(self):
+        period = self.create_period(["A", "B", "C"])
+        revision = period.revision
+
+        new_revision = self.update_period(period, [
+            self.generate_course("A"),
+            self.generate_course("B", class_name="B - 2"),
+            self.generate_course("D"),
+        ])
+        assert new_revision > revision
+
+        change = PeriodChange.objects(period_id=period.id).first()
+        assert change.previous_revision == revision
+        assert change.revision == new_revision
+        assert [course["name"] for course in change.added] == ["D"]
+        assert [course["name"] for course in change.modified] == ["B"]
+        assert change.removed == ["C"]
+
+    def test_unchanged_courses_keep_revision(self):
+        period = self.create_period(["A"])
+        revision = period.revision
+
+        assert self.update_period(period, [self.generate_course("A")]) == revision
+        assert len(PeriodChange.objects(period_id=period.id)) == 0
+
+    def test_get_delta_merges_changes(self):
+        period = self.create_period(["A", "B", "C"])
+        since = period.revision
+
+        self.update_period(period, [
+            self.generate_course("A"),
+            self.generate_course("B"),
+            self.generate_course("D"),
+        ])
+        revision = self.update_period(period, [
+            self.generate_course("A", class_name="A - 2"),
+            self.generate_course("C"),
+        ])
+
+        delta = PeriodChange.get_delta(period.id, since, revision)
+        assert sorted(course["name"] for course in delta["modified"]) == ["A", "C"]
+        assert delta["added"] == []
+        assert delta["removed"] == ["B"]
+
+        assert PeriodChange.get_delta(period.id, revision, revision) == {
+            "added": [], "modified": [], "removed": []}
+
+    def test_get_delta_requires_full_reload(self, monkeypatch):
+        monkeypatch.setattr(period_change, "CHANGE_LOG_SIZE", 2)
+        period = self.create_period(["A"])
+        since = period.revision
+
+        for name in ["B", "C", "D"]:
+            revision = self.update_period(period, [self.generate_course(name)])
+
+        assert len(PeriodChange.objects(period_id=period.id)) == 2
+        assert PeriodChange.get_delta(period.id, since, revision) is None
+        assert PeriodChange.get_delta(period.id, revision + 1, revision) is None
+
+        period.courses = [self.generate_course("E")]
+        period.save()
+        assert PeriodChange.get_delta(period.id, revision, period.revision) is None
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.major import Major
+from models.scrape_job import MAX_ATTEMPTS, ScrapeJob
+from .test_utils import TestBase
+
+
+@pytest.mark.usefixtures("mongo")
+class TestScrapeJob(TestBase):
+    def test_enqueue_once_per_major(self):
+        major = Major.objects().create(name="Ilmu Komputer", kd_org="01.00.12.01")
+        job = ScrapeJob.enqueue(major, "2020-2")
+        assert ScrapeJob.enqueue(major, "2020-2").id == job.id
+        assert job.kd_org == "01.00.12.01"
+        assert job.status == "pending"
+
+        claimed = ScrapeJob.claim()
+        claimed.finish()
+        assert claimed.status == "done"
+
+        # Finished jobs are only queued again after the retry interval
+        assert ScrapeJob.enqueue(major, "2020-2", retry_interval=600).status == "done"
+        assert ScrapeJob.enqueue(major, "2020-2", retry_interval=0).status == "pending"
+        assert len(ScrapeJob.objects) == 1
+
+    def test_claim_and_retry(self):
+        major = Major.objects().create(name="Ilmu Komputer", kd_org="01.00.12.01")
+        ScrapeJob.enqueue(major, "2020-2")
+
+        job = ScrapeJob.claim(lock_seconds=300)
+        assert job.status == "running"
+        assert job.attempts == 1
+        assert ScrapeJob.claim() is None
+
+        # A worker that died leaves the job to be claimed after its lock
+        job.update(set__locked_until=datetime.now() - timedelta(seconds=1))
+        job = ScrapeJob.claim()
+        assert job.attempts == 2
+
+        for attempt in range(job.attempts, MAX_ATTEMPTS):
+            now = datetime.now()
+            job.finish(error="timeout", retry_delay=60)
+            assert job.status == "pending"
+            # Retries back off, 60 seconds doubled after every attempt
+            delay = (job.queued_at - now).total_seconds()
+            assert abs(delay - 60 * 2 ** (attempt - 1)) < 5
+            assert ScrapeJob.claim() is None
+            job.update(set__queued_at=now)
+            job = ScrapeJob.claim()
+        job.finish(error="timeout")
+        assert job.status == "failed"
+        assert job.serialize()["error"] == "timeout"
+        assert ScrapeJob.claim() is None
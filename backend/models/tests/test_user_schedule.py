@@ -5,7 +5,12 @@ from mongoengine import ValidationError
 
 from models.major import Major
 from models.user import User
-from models.user_schedule import ScheduleItem, UserSchedule
+from models.user_schedule import (
+    ScheduleItem,
+    ScheduleItemSet,
+    UserSchedule,
+    load_schedule_item_set
+)
 from .test_utils import TestBase
 
 
@@ -157,6 +162,61 @@ class TestUserSchedule(TestBase):
 
         user_schedule.delete()
 
+    def test_identical_items_are_stored_once(self):
+        user = self.generate_random_user_item().save()
+        user_schedules = []
+        for name in ("Schedule A", "Schedule B"):
+            user_schedule = UserSchedule(user_id=user, name=name)
+            user_schedule.add_schedule_item(
+                name="Basdat - A", day="Senin", room="2.2304", start="08.00", end="09.40")
+            user_schedule.save()
+            user_schedules.append(user_schedule)
+
+        assert len(ScheduleItemSet.objects()) == 1
+        assert user_schedules[0].items_hash == user_schedules[1].items_hash
+        data = UserSchedule.objects(id=user_schedules[0].id).as_pymongo().first()
+        assert not data.get("schedule_items")
+        assert data["item_count"] == 1
+
+        fetched = UserSchedule.objects(id=user_schedules[1].id).first()
+        assert fetched.serialize()["schedule_items"] == [
+            item.serialize() for item in user_schedules[1].schedule_items]
+
+        fetched.add_schedule_item(name="Anum - A", day="Rabu", start="10.00", end="11.40")
+        fetched.save()
+        fetched = UserSchedule.objects(id=fetched.id).first()
+        assert len(fetched.schedule_items) == 2
+        assert len(ScheduleItemSet.objects()) == 2
+
+    def test_item_sets_of_many_schedules_load_in_one_query(self, monkeypatch):
+        user = self.generate_random_user_item().save()
+        for _ in range(3):
+            user_schedule = UserSchedule(user_id=user, name="Schedule")
+            user_schedule.schedule_items.append(self.generate_random_schedule_item())
+            user_schedule.save()
+
+        collection = ScheduleItemSet._get_collection()
+        find = collection.find
+        queries = []
+
+        def counted_find(*args, **kwargs):
+            queries.append(args)
+            return find(*args, **kwargs)
+
+        monkeypatch.setattr(collection, "find", counted_find)
+        schedules = UserSchedule.from_sons(UserSchedule.objects(user_id=user).as_pymongo())
+        assert [len(schedule.schedule_items) for schedule in schedules] == [1, 1, 1]
+        assert len(queries) == 1
+
+    def test_missing_item_set_is_not_cached(self):
+        item = self.generate_random_schedule_item()
+        items_hash = ScheduleItemSet.get_hash([item.serialize()])
+        assert load_schedule_item_set(items_hash) == ()
+
+        assert ScheduleItemSet.store([item]) == items_hash
+        assert [ScheduleItem.serialize_raw(data) for data in load_schedule_item_set(items_hash)] \
+            == [item.serialize()]
+
     def test_user_schedule_update(self):
         user_schedule = UserSchedule.objects().create(
             user_id=None, name="Old Schedule", schedule_items=[]
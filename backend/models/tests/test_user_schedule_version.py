@@ -0,0 +1,45 @@
+import pytest
+
+from models import user_schedule_version
+from models.user_schedule import ScheduleItem, ScheduleItemSet
+from models.user_schedule_version import UserScheduleVersion
+from .test_utils import TestBase
+
+
+@pytest.mark.usefixtures("mongo")
+class TestUserScheduleVersion(TestBase):
+    def generate_item(self, name):
+        return {"name": name, "day": "Senin", "room": None, "start": "08.00", "end": "09.40"}
+
+    def update(self, user_schedule_id, version, old_items, new_items):
+        store = lambda items: ScheduleItemSet.store([ScheduleItem(**item) for item in items])
+        return UserScheduleVersion.record(
+            user_schedule_id, version, old_items, new_items, store(old_items), store(new_items))
+
+    def test_record_diff(self):
+        first, second = self.generate_item("A"), self.generate_item("B")
+        change = self.update("5fdbb1a6bbc4000000000000", 1, [first, first], [first, second])
+
+        assert change.added == [second]
+        assert change.removed == [first]
+        assert change.items_hash is None
+        snapshot = UserScheduleVersion.objects(version=0).first()
+        assert snapshot.items_hash is not None
+
+    def test_get_items_replays_from_latest_snapshot(self, monkeypatch):
+        monkeypatch.setattr(user_schedule_version, "SNAPSHOT_INTERVAL", 3)
+        user_schedule_id = "5fdbb1a6bbc4000000000000"
+        states = [[]]
+        for version in range(1, 8):
+            items = states[-1] + [self.generate_item(str(version))]
+            if version % 2 == 0:
+                items = items[1:]
+            self.update(user_schedule_id, version, states[-1], items)
+            states.append(items)
+
+        snapshots = [
+            change.version for change in UserScheduleVersion.objects(items_hash__ne=None)]
+        assert sorted(snapshots) == [0, 3, 6]
+        for version, items in enumerate(states):
+            assert UserScheduleVersion.get_items(user_schedule_id, version) == items
+        assert UserScheduleVersion.get_items(user_schedule_id, 8) is None
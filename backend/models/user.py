@@ -7,3 +7,10 @@ class User(mongo.Document):
     npm = mongo.StringField(max_length=20)
     batch = mongo.StringField(max_length=5)
     major = mongo.ReferenceField("Major")
+
+    meta = {
+        "indexes": [
+            {"fields": ["npm"], "unique": True, "sparse": True},
+        ],
+        "auto_create_index": False,  # see `flask cron ensure_indexes`
+    }
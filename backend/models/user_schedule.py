@@ -1,6 +1,13 @@
+import collections
+import hashlib
+import json
+import threading
+
 import mongoengine as mongo
 from datetime import datetime
 
+from models.period import get_day_index, get_minutes
+
 
 class ScheduleItem(mongo.EmbeddedDocument):
     name = mongo.StringField(max_length=128)
@@ -8,6 +15,15 @@ class ScheduleItem(mongo.EmbeddedDocument):
     room = mongo.StringField(max_length=64)
     start = mongo.StringField(max_length=16)
     end = mongo.StringField(max_length=16)
+    # Parsed `day`, `start` and `end`, filled on validation
+    day_index = mongo.IntField(min_value=0, max_value=6)
+    start_minutes = mongo.IntField()
+    end_minutes = mongo.IntField()
+
+    def clean(self):
+        self.day_index = get_day_index(self.day)
+        self.start_minutes = get_minutes(self.start)
+        self.end_minutes = get_minutes(self.end)
 
     def serialize(self):
         return {
@@ -18,13 +34,164 @@ class ScheduleItem(mongo.EmbeddedDocument):
             "end": self.end,
         }
 
+    @staticmethod
+    def serialize_raw(data):
+        """Same as `serialize()`, straight from the stored BSON document."""
+        return {
+            "name": data.get("name"),
+            "day": data.get("day"),
+            "room": data.get("room"),
+            "start": data.get("start"),
+            "end": data.get("end"),
+        }
+
+
+class ScheduleItemSet(mongo.Document):
+    """Schedule items shared by every UserSchedule with the same items.
+
+    Keyed by the hash of the serialized items, so a stored set never
+    changes and can be cached without invalidation.
+    """
+
+    id = mongo.StringField(primary_key=True, max_length=40)
+    schedule_items = mongo.ListField(mongo.EmbeddedDocumentField(ScheduleItem))
+
+    meta = {
+        "auto_create_index": False,  # only looked up by _id
+    }
+
+    @staticmethod
+    def get_hash(serialized_items):
+        content = json.dumps(serialized_items, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(content.encode()).hexdigest()
+
+    @classmethod
+    def store(cls, schedule_items):
+        """Store validated items unless an equal set exists, return its hash."""
+        items_hash = cls.get_hash([item.serialize() for item in schedule_items])
+        cls._get_collection().update_one(
+            {"_id": items_hash},
+            {"$setOnInsert": {
+                "schedule_items": [item.to_mongo() for item in schedule_items]}},
+            upsert=True
+        )
+        return items_hash
+
+
+ITEM_SET_CACHE_SIZE = 1024
+_item_set_cache = collections.OrderedDict()  # items hash -> stored item dicts
+_item_set_lock = threading.Lock()
+
+
+def load_schedule_item_sets(items_hashes):
+    """Return {hash: stored item dicts} of the ScheduleItemSets that exist.
+
+    Sets not cached yet are loaded with a single `$in` query. Stored sets
+    never change, so they are cached least-recently-used without
+    invalidation. Missing ones are not cached, so a set stored later is
+    found by the next call.
+    """
+    found, missing = {}, []
+    with _item_set_lock:
+        for items_hash in dict.fromkeys(items_hashes):
+            if items_hash in _item_set_cache:
+                _item_set_cache.move_to_end(items_hash)
+                found[items_hash] = _item_set_cache[items_hash]
+            else:
+                missing.append(items_hash)
+    if not missing:
+        return found
+
+    loaded = {
+        data["_id"]: tuple(data.get("schedule_items", []))
+        for data in ScheduleItemSet.objects(id__in=missing).as_pymongo()
+    }
+    with _item_set_lock:
+        for items_hash, items in loaded.items():
+            _item_set_cache[items_hash] = items
+        while len(_item_set_cache) > ITEM_SET_CACHE_SIZE:
+            _item_set_cache.popitem(last=False)
+    found.update(loaded)
+    return found
+
+
+def load_schedule_item_set(items_hash):
+    """Return the stored item dicts of a ScheduleItemSet, () if missing."""
+    return load_schedule_item_sets([items_hash]).get(items_hash, ())
+
 
 class UserSchedule(mongo.Document):
     user_id = mongo.ReferenceField("User")
     name = mongo.StringField(max_length=128)
+    # Only kept in memory, stored once per distinct list in ScheduleItemSet.
+    # Documents saved before that still embed them.
     schedule_items = mongo.ListField(mongo.EmbeddedDocumentField(ScheduleItem))
+    items_hash = mongo.StringField(max_length=40)
+    item_count = mongo.IntField()
     deleted = mongo.BooleanField(default=False)
     created_at = mongo.DateTimeField(default=datetime.now)
+    # Number of updates, see UserScheduleVersion
+    version = mongo.IntField(default=0)
+
+    meta = {
+        "indexes": [
+            {
+                "fields": ["user_id", "-created_at", "-id"],
+                "partialFilterExpression": {"deleted": False},
+            },
+        ],
+        "auto_create_index": False,  # see `flask cron ensure_indexes`
+    }
+
+    # `$project` stage of `serialize_summary_raw()`, items are only counted
+    SUMMARY_PROJECTION = {
+        "name": 1,
+        "created_at": 1,
+        "item_count": {"$ifNull": [
+            "$item_count", {"$size": {"$ifNull": ["$schedule_items", []]}}]},
+    }
+
+    @classmethod
+    def _from_son(cls, son, *args, **kwargs):
+        document = super()._from_son(son, *args, **kwargs)
+        if document.items_hash and not document.schedule_items:
+            # Set without marking the field as changed
+            document._data["schedule_items"] = [
+                ScheduleItem._from_son(item)
+                for item in load_schedule_item_set(document.items_hash)
+            ]
+        return document
+
+    @classmethod
+    def from_sons(cls, sons):
+        """Return documents of stored BSON documents, like a queryset would.
+
+        The item sets of all of them are loaded in one query up front,
+        instead of one query per document in `_from_son`.
+        """
+        sons = list(sons)
+        load_schedule_item_sets(
+            son["items_hash"] for son in sons
+            if son.get("items_hash") and not son.get("schedule_items"))
+        return [cls._from_son(son) for son in sons]
+
+    def store_schedule_items(self):
+        """Store the items in their ScheduleItemSet and point to it."""
+        self.items_hash = ScheduleItemSet.store(self.schedule_items)
+        self.item_count = len(self.schedule_items)
+
+    def save(self, *args, **kwargs):
+        if kwargs.get("validate", True):
+            self.validate(clean=kwargs.get("clean", True))
+            kwargs["validate"] = False
+
+        schedule_items = self.schedule_items
+        self.store_schedule_items()
+        self.schedule_items = []
+        try:
+            return super().save(*args, **kwargs)
+        finally:
+            self._data["schedule_items"] = schedule_items
 
     def add_schedule_item(self, **kwargs):
         data = ScheduleItem(**kwargs)
@@ -42,5 +209,19 @@ class UserSchedule(mongo.Document):
             "id": str(self.id),
             "name": self.name,
             "created_at": self.created_at,
+            "version": self.version,
             "schedule_items": self.__get_schedule_items(),
         }
+
+    @staticmethod
+    def serialize_summary_raw(data):
+        """Return id, name, created_at and item count of a projected document.
+
+        `data` is a document projected with `SUMMARY_PROJECTION`.
+        """
+        return {
+            "id": str(data["_id"]),
+            "name": data.get("name"),
+            "created_at": data.get("created_at"),
+            "item_count": data.get("item_count", 0),
+        }
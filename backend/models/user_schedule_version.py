@@ -0,0 +1,110 @@
+import collections
+import json
+from datetime import datetime
+
+import mongoengine as mongo
+
+from models.user_schedule import ScheduleItem, load_schedule_item_set
+
+SNAPSHOT_INTERVAL = 10  # every n-th version also stores the full items
+
+
+def get_item_key(item):
+    return json.dumps(item, sort_keys=True)
+
+
+class UserScheduleVersion(mongo.Document):
+    """Items added and removed by one update of a UserSchedule.
+
+    Items are stored serialized. Version 0 and every `SNAPSHOT_INTERVAL`-th
+    version also point to the ScheduleItemSet of their full items, so a
+    reconstruction replays fewer than `SNAPSHOT_INTERVAL` diffs.
+    """
+
+    user_schedule_id = mongo.ReferenceField("UserSchedule")
+    version = mongo.IntField()
+    added = mongo.ListField(mongo.DictField())
+    removed = mongo.ListField(mongo.DictField())
+    items_hash = mongo.StringField(max_length=40)  # set on snapshots only
+    created_at = mongo.DateTimeField(default=datetime.now)
+
+    meta = {
+        "indexes": [
+            ("user_schedule_id", "-version"),
+        ],
+        "auto_create_index": False,  # see `flask cron ensure_indexes`
+    }
+
+    @classmethod
+    def record(cls, user_schedule_id, version, old_items, new_items,
+               old_items_hash, items_hash):
+        """Log the update from `version - 1` to `version`.
+
+        The first update also records version 0 as a snapshot of the
+        items the schedule was created with.
+        """
+        if version == 1:
+            cls(user_schedule_id=user_schedule_id, version=0,
+                items_hash=old_items_hash).save()
+
+        old = collections.Counter(get_item_key(item) for item in old_items)
+        new = collections.Counter(get_item_key(item) for item in new_items)
+        change = cls(
+            user_schedule_id=user_schedule_id,
+            version=version,
+            added=[json.loads(key) for key in (new - old).elements()],
+            removed=[json.loads(key) for key in (old - new).elements()],
+        )
+        if version % SNAPSHOT_INTERVAL == 0:
+            change.items_hash = items_hash
+        change.save()
+        return change
+
+    @classmethod
+    def get_items(cls, user_schedule_id, version):
+        """Return the serialized items of a version, None if not logged.
+
+        Items added by a diff come last, so the order may differ from the
+        one the version was saved with.
+        """
+        snapshot = cls.objects(
+            user_schedule_id=user_schedule_id,
+            version__lte=version,
+            items_hash__ne=None
+        ).order_by("-version").first()
+        if snapshot is None:
+            return None
+
+        items = [
+            ScheduleItem.serialize_raw(item)
+            for item in load_schedule_item_set(snapshot.items_hash)
+        ]
+        changes = cls.objects(
+            user_schedule_id=user_schedule_id,
+            version__gt=snapshot.version,
+            version__lte=version
+        ).order_by("version")
+        replayed = snapshot.version
+        for change in changes:
+            removed = collections.Counter(get_item_key(item) for item in change.removed)
+            kept = []
+            for item in items:
+                key = get_item_key(item)
+                if removed[key]:
+                    removed[key] -= 1
+                else:
+                    kept.append(item)
+            items = kept + list(change.added)
+            replayed = change.version
+        if replayed != version:
+            return None
+        return items
+
+    def serialize(self):
+        return {
+            "version": self.version,
+            "created_at": self.created_at,
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "snapshot": self.items_hash is not None,
+        }
@@ -11,6 +11,7 @@ from flask import (
 )
 from werkzeug.utils import secure_filename
 
+from app.cache import invalidate_courses
 from models.major import Major
 from models.period import Period
 from uploader.decorators import require_jwt_cookie
@@ -109,7 +110,7 @@ def upload(profile):
                 ).first()
 
                 if instance:
-                    instance.courses = courses
+                    instance.replace_courses(courses)
                 else:
                     instance = Period(
                         major_id=major.id,
@@ -118,6 +119,7 @@ def upload(profile):
                         is_detail=True
                     )
                 instance.save()
+                invalidate_courses(major.id, period)
 
                 timestamp = int(time.time())
                 filename = f"{kd_org}_{timestamp}_{secure_filename(file_.filename)}"
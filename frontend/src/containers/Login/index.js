@@ -7,17 +7,39 @@ import GojekLogo from 'assets/gojek_logo.svg';
 import Tagline from 'assets/tagline.svg';
 import { setAuth } from 'redux/modules/auth';
 import { setLoading } from 'redux/modules/appState';
-import { postAuthTicket } from 'services/api';
+import { getPeriodStatus, postAuthTicket } from 'services/api';
 import { redirectToSSOLogin, redirectToSSOLogout } from 'services/sso';
 import { persistAuth } from 'utils/auth';
-import { makeAtLeastMs } from 'utils/promise';
+import { delay, makeAtLeastMs } from 'utils/promise';
 
 import './styles.css';
 
+const PERIOD_POLL_INTERVAL_MS = 3000;
+const PERIOD_POLL_TIMEOUT_MS = 5 * 60 * 1000;
+
 function getServiceUrl() {
   return window.location.href.split('?')[0];
 }
 
+// Courses of a major logging in for the first time are scraped in the
+// background, resolves to whether the major turned out to be supported.
+async function waitForPeriod(majorId, token, deadline) {
+  const {
+    data: { ready, job },
+  } = await getPeriodStatus(majorId, token);
+  if (ready) {
+    return true;
+  }
+  if (!job || job.status === 'done') {
+    return false;
+  }
+  if (job.status === 'failed' || Date.now() > deadline) {
+    throw new Error('Courses of this major are not available yet');
+  }
+  await delay(PERIOD_POLL_INTERVAL_MS);
+  return waitForPeriod(majorId, token, deadline);
+}
+
 function Login({ history, location }) {
   const [error, setError] = useState(null);
   const auth = useSelector((state) => state.auth);
@@ -34,10 +56,15 @@ function Login({ history, location }) {
             token,
             err,
             major_name: majorName,
+            period_ready: periodReady,
           },
         } = await makeAtLeastMs(postAuthTicket(ticket, serviceUrl), 1000);
 
-        if (err) {
+        const supported = !err && (
+          periodReady !== false
+          || await waitForPeriod(majorId, token, Date.now() + PERIOD_POLL_TIMEOUT_MS)
+        );
+        if (!supported) {
           dispatch(setLoading(false));
           setError({
             majorName,
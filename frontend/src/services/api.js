@@ -16,6 +16,12 @@ export function getCourses(majorId) {
   return instance.get(`/majors/${majorId}/courses`);
 }
 
+export function getPeriodStatus(majorId, token) {
+  return instance.get(`/majors/${majorId}/period_status`, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+}
+
 export function postSaveSchedule(userId, scheduleItems) {
   return instance.post(`/users/${userId}/user_schedule`, {
     schedule_items: scheduleItems,